@@ -14,3 +14,13 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "finance.settings")
 
 application = get_asgi_application()
+
+# Imported once the apps are loaded; a no-op without TOTALS_CHECK_INTERVAL
+from ui.totals import start_totals_checker  # noqa: E402
+
+start_totals_checker()
+
+# Fail the import jobs a previous worker on this host left unfinished
+from ui.jobs import start_import_recovery  # noqa: E402
+
+start_import_recovery()
@@ -1,120 +1,545 @@
-import json
-from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 
 from .models import *
 import pandas as pd
-from django.db import transaction
-from django.db.models import fields
+from django.core.management.color import no_style
+from django.db import OperationalError, connection, transaction
+from django.db import models
+from django.db.models import ProtectedError, fields
 import pandas as pd
 
 # models_columns.py
+import csv
+import datetime
+import zlib
+from asgiref.sync import sync_to_async
 from django.apps import apps
-from decimal import Decimal
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
 from io import BytesIO
+from itertools import chain, islice
+from tempfile import SpooledTemporaryFile
 
 import pandas as pd
-from django.http import HttpResponse, JsonResponse
+from django.http import FileResponse, StreamingHttpResponse
+from openpyxl import Workbook, load_workbook
+from openpyxl.utils import get_column_letter
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET
+
+from .caching import (
+    CATEGORIES,
+    LEDGER,
+    LEDGER_REWRITES,
+    acached_response,
+    bump_version,
+    get_version,
+)
+from .fields import MoneyField
+from .fingerprints import SheetDigest, row_digest, store_digests, stored_digests
+from .jobs import enqueue_import, job_status
+from .metrics import phase, timed_iter
+from .models import Category, ImportJob, Transaction
+from .responses import dumps, json_response, records, wants_pretty
+from .rollups import apply_rollup_deltas
+from .totals import recompute_category_totals
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+EXPORT_CHUNK_SIZE = 2000
+# Column widths are sized from the first rows only, so the table is read once
+WIDTH_SAMPLE_ROWS = 500
+MAX_COLUMN_WIDTH = 50
+# Exports larger than this spill from memory to a temporary file on disk
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+
+# Foreign keys to Category are written out as its natural key
+CATEGORY_KEY = ("category", "subcategory")
+
+
+def export_columns(model):
+    """``(column name, values_list lookup)`` pairs for ``model``, in sheet order."""
+    columns = []
+    for field in model._meta.concrete_fields:
+        if field.is_relation:
+            columns += [(name, f"{field.name}__{name}") for name in CATEGORY_KEY]
+        else:
+            columns.append((field.attname, field.attname))
+    return columns
+
+
+def resolve_field(model, lookup):
+    """The model field a lookup such as ``category_ref__category`` ends on."""
+    *path, name = lookup.split("__")
+    for step in path:
+        model = model._meta.get_field(step).related_model
+    return model._meta.get_field(name)
+
+
+def _export_value(value):
+    if isinstance(value, datetime.datetime):
+        # Format datetime for better readability, as naive UTC
+        if timezone.is_aware(value):
+            value = timezone.make_naive(value, datetime.timezone.utc)
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value
+
+
+def sheet_columns(model):
+    """The exported columns an import reads back: all but the primary key."""
+    pk_name = model._meta.pk.attname
+    return [column for column, _ in export_columns(model) if column != pk_name]
+
+
+def digest_columns(model):
+    """The columns a sheet's fingerprint covers: those its import reads."""
+    strategy = SYNC_STRATEGIES[model.__name__]
+    columns = [
+        column for column in sheet_columns(model) if column not in strategy.exclude
+    ]
+    if strategy.uses_pk:
+        columns.insert(0, model._meta.pk.attname)
+    return columns
+
+
+def write_model_sheet(workbook, model, chunk_size=EXPORT_CHUNK_SIZE, digest=None):
+    """
+    Stream every row of ``model`` into a new sheet of a write-only workbook.
 
-from .models import Category, Transaction
+    If ``digest`` is given, each row's ``digest_columns`` are added to it.
+    """
+    with phase("workbook_write"):
+        return _write_model_sheet(workbook, model, chunk_size, digest)
+
+
+def _write_model_sheet(workbook, model, chunk_size, digest):
+    columns, lookups = zip(*export_columns(model))
+    worksheet = workbook.create_sheet(model.__name__)
+    if digest is not None:
+        digested = [columns.index(column) for column in digest_columns(model)]
+
+    def export_row(row):
+        if digest is not None:
+            digest.add(tuple(row[i] for i in digested))
+        return [_export_value(value) for value in row]
+
+    rows = (
+        export_row(row)
+        for row in timed_iter(
+            "query",
+            model.objects.values_list(*lookups).iterator(chunk_size=chunk_size),
+        )
+    )
+    sample = list(islice(rows, WIDTH_SAMPLE_ROWS))
+
+    # Write-only sheets need their column widths before the first row
+    widths = [len(col) for col in columns]
+    for row in sample:
+        for i, value in enumerate(row):
+            widths[i] = max(widths[i], len(str(value)))
+    for i, width in enumerate(widths):
+        worksheet.column_dimensions[get_column_letter(i + 1)].width = min(
+            width + 2, MAX_COLUMN_WIDTH
+        )
+
+    worksheet.append(list(columns))
+    count = 0
+    for row in chain(sample, rows):
+        worksheet.append(row)
+        count += 1
+    return count
 
 
 def create_excel_response(request):
-    output = BytesIO()
-
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        # 1. Export Category data
-        categories = Category.objects.all()
-        if categories.exists():
-            df_categories = pd.DataFrame(list(categories.values()))
-            # Format column names
-            # df_categories.columns = [col.replace('_', ' ').title() for col in df_categories.columns]
-            # Write to Excel with auto-width columns
-            df_categories.to_excel(writer, sheet_name="Category", index=False)
-
-            # Auto-adjust column widths for Categories sheet
-            worksheet_cat = writer.sheets["Category"]
-            for i, col in enumerate(df_categories.columns):
-                column_width = (
-                    max(df_categories[col].astype(str).map(len).max(), len(col)) + 2
-                )
-                worksheet_cat.column_dimensions[chr(65 + i)].width = min(
-                    column_width, 50
-                )
-
-        # 2. Export Transaction data
-        transactions = Transaction.objects.all()
-        if transactions.exists():
-            trans_values = list(transactions.values())
-            df_transactions = pd.DataFrame(trans_values)
-
-            # Handle datetime field
-            if "datetime" in df_transactions.columns:
-                df_transactions["datetime"] = pd.to_datetime(
-                    df_transactions["datetime"]
-                )
-                if df_transactions["datetime"].dt.tz is not None:
-                    df_transactions["datetime"] = df_transactions[
-                        "datetime"
-                    ].dt.tz_localize(None)
-
-                # Format datetime for better readability
-                df_transactions["datetime"] = df_transactions["datetime"].dt.strftime(
-                    "%Y-%m-%d %H:%M:%S"
-                )
-
-            # Format column names
-            # df_transactions.columns = [col.replace('_', ' ').title() for col in df_transactions.columns]
-            # Write to Excel
-            df_transactions.to_excel(writer, sheet_name="Transaction", index=False)
-
-            # Auto-adjust column widths for Transactions sheet
-            worksheet_trans = writer.sheets["Transaction"]
-            for i, col in enumerate(df_transactions.columns):
-                column_width = (
-                    max(df_transactions[col].astype(str).map(len).max(), len(col)) + 2
-                )
-                worksheet_trans.column_dimensions[chr(65 + i)].width = min(
-                    column_width, 50
-                )
-
-    # Prepare the HTTP response
+    # openpyxl's write-only mode keeps a constant amount of each sheet in
+    # memory, and the finished file is spooled to disk once it gets large
+    workbook = Workbook(write_only=True)
+    # Read before the rows, so a concurrent write outdates the fingerprints
+    version = get_version(LEDGER)
+    digests = {}
+    for model in (Category, Transaction):
+        digests[model.__name__] = SheetDigest()
+        write_model_sheet(workbook, model, digest=digests[model.__name__])
+    # Lets a re-upload of this file skip the sheets that were not edited
+    store_digests(digests, version)
+
+    output = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    with phase("workbook_write"):
+        workbook.save(output)
     output.seek(0)
-    response = HttpResponse(
-        output.read(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename="budget_data_export.xlsx",
+        content_type=XLSX_CONTENT_TYPE,
+    )
+
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "json": ("application/json", "json"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+# Text formats are gzipped on the fly for clients that accept it
+GZIP_FORMATS = ("csv", "ndjson", "json")
+EXPORT_MODELS = {"category": Category, "transaction": Transaction}
+# Query parameters each table can be filtered on, and the lookups behind them
+EXPORT_FILTERS = {
+    Category: {"category": "category", "subcategory": "subcategory"},
+    Transaction: {
+        "category": "category_ref__category",
+        "subcategory": "category_ref__subcategory",
+        "from": "datetime__gte",
+        "to": "datetime__lt",
+    },
+}
+
+
+def _accepts_gzip(header):
+    """
+    Whether an Accept-Encoding header allows gzip.
+
+    A ``gzip`` entry takes precedence over ``*``, and either is refused
+    with ``q=0``.
+    """
+    qualities = {}
+    for entry in header.split(","):
+        coding, *params = [part.strip() for part in entry.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+
+def export_filters(model, params):
+    """
+    ``filter()`` keyword arguments for the export query parameters.
+
+    ``from`` and ``to`` are inclusive ISO dates, taken as whole UTC days.
+    Raises ValueError for a parameter the table has no column for, or a
+    malformed date.
+    """
+    allowed = EXPORT_FILTERS.get(model, {})
+    filters = {}
+    for param in ("category", "subcategory", "from", "to"):
+        value = params.get(param)
+        if not value:
+            continue
+        if param not in allowed:
+            raise ValueError(f"{model.__name__} exports cannot be filtered by {param}")
+        if param in ("from", "to"):
+            try:
+                day = datetime.date.fromisoformat(value)
+            except ValueError:
+                raise ValueError(f"Invalid {param} date, expected YYYY-MM-DD")
+            if param == "to":
+                day += datetime.timedelta(days=1)
+            value = datetime.datetime.combine(
+                day, datetime.time.min, tzinfo=datetime.timezone.utc
+            )
+        filters[allowed[param]] = value
+    return filters
+
+
+def _export_rows(model, columns, filters=None):
+    return (
+        model.objects.filter(**(filters or {}))
+        .values_list(*[lookup for _, lookup in columns])
+        .order_by("pk")
+    )
+
+
+def iter_row_chunks(model, columns, chunk_size=EXPORT_CHUNK_SIZE, filters=None):
+    """Yield lists of up to ``chunk_size`` value tuples for ``export_columns``."""
+    chunk = []
+    rows = _export_rows(model, columns, filters).iterator(chunk_size=chunk_size)
+    for row in timed_iter("query", rows):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def aiter_row_chunks(model, columns, chunk_size=EXPORT_CHUNK_SIZE, filters=None):
+    """
+    Async ``iter_row_chunks``, for responses streamed under ASGI.
+
+    Each chunk is its own ``pk > last`` query rather than one ``aiterator()``:
+    values_list iterables execute their query when the iterator is created,
+    which ``aiterator()`` does on the event loop.
+    """
+    rows = (
+        model.objects.filter(**(filters or {}))
+        .values_list("pk", *[lookup for _, lookup in columns])
+        .order_by("pk")
+    )
+    last_pk = None
+    while True:
+        page = rows if last_pk is None else rows.filter(pk__gt=last_pk)
+        with phase("query"):
+            chunk = [row async for row in page[:chunk_size]]
+        if chunk:
+            last_pk = chunk[-1][0]
+            yield [row[1:] for row in chunk]
+        if len(chunk) < chunk_size:
+            return
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+async def _stream_csv(model, columns, filters=None):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in columns])
+    async for chunk in aiter_row_chunks(model, columns, filters=filters):
+        yield "".join(
+            writer.writerow(
+                [v.isoformat() if isinstance(v, datetime.datetime) else v for v in row]
+            )
+            for row in chunk
+        )
+
+
+async def _stream_ndjson(model, columns, filters=None):
+    names = [name for name, _ in columns]
+    async for chunk in aiter_row_chunks(model, columns, filters=filters):
+        yield b"".join(dumps(record) + b"\n" for record in records(names, chunk))
+
+
+async def _stream_json_array(model, columns, filters=None):
+    names = [name for name, _ in columns]
+    # The opening bracket goes out before the first query returns
+    yield b"["
+    separator = b""
+    async for chunk in aiter_row_chunks(model, columns, filters=filters):
+        # One encoder call per chunk, without the chunk's own brackets
+        yield separator + dumps(records(names, chunk))[1:-1]
+        separator = b","
+    yield b"]"
+
+
+async def _agzip(stream):
+    """
+    Gzip an async byte or str stream, flushing after every chunk so each
+    one still reaches the client as soon as it is read.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in stream:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def arrow_schema(model, columns):
+    """Typed Arrow schema for ``columns``: Decimal amounts, UTC timestamps."""
+    import pyarrow as pa
+
+    arrow_fields = []
+    for name, lookup in columns:
+        field = resolve_field(model, lookup)
+        if isinstance(field, (models.DecimalField, MoneyField)):
+            arrow_type = pa.decimal128(field.max_digits, field.decimal_places)
+        elif isinstance(field, models.DateTimeField):
+            arrow_type = pa.timestamp("us", tz="UTC")
+        elif isinstance(field, models.IntegerField):
+            arrow_type = pa.int64()
+        else:
+            arrow_type = pa.string()
+        arrow_fields.append(pa.field(name, arrow_type, nullable=field.null))
+    return pa.schema(arrow_fields)
+
+
+def _record_batch(chunk, schema):
+    import pyarrow as pa
+
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array(values, type=field.type)
+            for values, field in zip(zip(*chunk), schema)
+        ],
+        schema=schema,
     )
-    response["Content-Disposition"] = 'attachment; filename="budget_data_export.xlsx"'
 
+
+def iter_record_batches(model, columns, schema, filters=None):
+    for chunk in iter_row_chunks(model, columns, filters=filters):
+        yield _record_batch(chunk, schema)
+
+
+async def _stream_arrow(model, columns, filters=None):
+    import pyarrow as pa
+
+    schema = arrow_schema(model, columns)
+    sink = BytesIO()
+
+    def drain():
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    # The IPC stream format is written strictly front to back, so each
+    # batch can be sent as soon as it is encoded
+    writer = pa.ipc.new_stream(sink, schema)
+    yield drain()
+    async for chunk in aiter_row_chunks(model, columns, filters=filters):
+        writer.write_batch(_record_batch(chunk, schema))
+        yield drain()
+    writer.close()
+    yield drain()
+
+
+def _write_parquet(model, columns, filters=None):
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema(model, columns)
+    output = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    # One row group per chunk; the footer is only known at the end, so the
+    # file is spooled rather than streamed
+    with phase("parquet_write"), pq.ParquetWriter(output, schema) as writer:
+        for batch in iter_record_batches(model, columns, schema, filters):
+            writer.write_batch(batch)
+    output.seek(0)
+    return output
+
+
+@require_GET
+async def export_table(request, table):
+    """
+    Export one table as CSV, NDJSON, a JSON array, Parquet or Arrow IPC.
+
+    The format comes from ``?format=`` or, failing that, the Accept header,
+    and defaults to CSV. Rows can be narrowed with ``category``,
+    ``subcategory`` and, for transactions, ``from`` / ``to`` dates. All but
+    Parquet are streamed from async generators that read the table in
+    chunks, and the text formats are gzipped when the client accepts it;
+    Parquet needs its footer last, so it is spooled in a worker thread.
+    """
+    model = EXPORT_MODELS.get(table.lower())
+    if model is None:
+        return json_response(
+            {"status": "error", "msg": f"Unknown table '{table}'"}, status=404
+        )
+
+    fmt = request.GET.get("format")
+    if fmt is None:
+        preferred = request.get_preferred_type(
+            [content_type for content_type, _ in EXPORT_FORMATS.values()]
+        )
+        fmt = next(
+            (
+                name
+                for name, (content_type, _) in EXPORT_FORMATS.items()
+                if content_type == preferred
+            ),
+            "csv",
+        )
+    fmt = fmt.lower()
+    if fmt not in EXPORT_FORMATS:
+        return json_response(
+            {
+                "status": "error",
+                "msg": f"Unsupported format '{fmt}', expected one of {sorted(EXPORT_FORMATS)}",
+            },
+            status=400,
+        )
+    try:
+        filters = export_filters(model, request.GET)
+    except ValueError as err:
+        return json_response({"status": "error", "msg": str(err)}, status=400)
+
+    content_type, extension = EXPORT_FORMATS[fmt]
+    filename = f"{model.__name__.lower()}.{extension}"
+    columns = export_columns(model)
+
+    if fmt in ("arrow", "parquet"):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return json_response(
+                {"status": "error", "msg": f"{fmt} export requires pyarrow"},
+                status=501,
+            )
+
+    if fmt == "parquet":
+        return FileResponse(
+            await sync_to_async(_write_parquet)(model, columns, filters),
+            as_attachment=True,
+            filename=filename,
+            content_type=content_type,
+        )
+
+    stream = {
+        "csv": _stream_csv,
+        "ndjson": _stream_ndjson,
+        "json": _stream_json_array,
+        "arrow": _stream_arrow,
+    }[fmt](model, columns, filters)
+    gzipped = fmt in GZIP_FORMATS and _accepts_gzip(
+        request.headers.get("Accept-Encoding", "")
+    )
+    if gzipped:
+        stream = _agzip(stream)
+
+    response = StreamingHttpResponse(stream, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    if fmt in GZIP_FORMATS:
+        patch_vary_headers(response, ("Accept-Encoding",))
+    if gzipped:
+        response["Content-Encoding"] = "gzip"
     return response
 
 
-def export_to_json(request):
-    # Get all categories
-    categories = Category.objects.all()
+async def _typst_json(pretty=False):
+    # Get all categories, in a stable order so the ETag names one body
+    categories = Category.objects.order_by("pk").values_list(
+        "category", "subcategory", "total_sum"
+    )
 
     # Create the nested structure you want
     result = {}
 
-    for item in categories:
-        total_sum = (
-            float(item.total_sum)
-            if isinstance(item.total_sum, Decimal)
-            else item.total_sum
-        )
-
-        if item.category not in result:
-            result[item.category] = {}
+    async for category, subcategory, total_sum in categories:
+        if category not in result:
+            result[category] = {}
 
         # Add subcategory and total_sum to the category
-        result[item.category][item.subcategory] = total_sum
+        result[category][subcategory] = total_sum
+
+    return dumps(result, pretty)
+
 
-    return JsonResponse(result, safe=False, json_dumps_params={"indent": 2})
+async def export_to_json(request):
+    # The Typst feed only changes after a write to the ledger
+    pretty = wants_pretty(request)
+    return await acached_response(request, "typst-json", lambda: _typst_json(pretty))
 
 
-def get_model_columns():
-    """Get expected columns for all models in the 'ui' app."""
+# Models that have a sheet in the exported workbook
+SHEET_MODELS = ("Category", "Transaction")
+
+
+def get_model_columns(model_names=SHEET_MODELS):
+    """Get expected columns for the workbook models in the 'ui' app."""
     expected = {}
     app_label = "ui"
 
@@ -123,15 +548,10 @@ def get_model_columns():
     except LookupError:
         raise ValueError(f"App '{app_label}' not found in INSTALLED_APPS")
 
-    for model in app_config.get_models():
-        name = model.__name__
-        # Get all concrete, non-auto-created fields
-        cols = [
-            f.name
-            for f in model._meta.get_fields()
-            if f.concrete and not (f.auto_created or f.many_to_many)
-        ]
-        expected[name] = sorted(cols)  # Sort for consistent comparison
+    for name in model_names:
+        model = app_config.get_model(name)
+        # Sort for consistent comparison
+        expected[name] = sorted(sheet_columns(model))
 
     return expected
 
@@ -139,162 +559,684 @@ def get_model_columns():
 # excel_importer.py
 
 
-def import_excel_strict(file):
-    EXPECTED_COLUMNS = get_model_columns()
-
+def find_sheet(sheet, sheet_names):
+    """Return the workbook's name for ``sheet``, matching case-insensitively."""
+    if sheet in sheet_names:
+        return sheet
+    # Case-insensitive check
+    sheet_lower = sheet.lower()
+    matched = [s for s in sheet_names if s.lower() == sheet_lower]
+    if matched:
+        return matched[0]  # Use the actual sheet name
+    raise ValueError(f"Required sheet '{sheet}' missing!")
+
+
+def validate_columns(sheet, columns, expected_cols):
+    """Raise ValueError unless ``columns`` match ``expected_cols`` (``id`` is optional)."""
+    actual_cols = sorted([str(col).lower() for col in columns])
+    expected_cols_sorted = sorted([str(col).lower() for col in expected_cols])
+    actual_set = sorted(set(actual_cols) - {"id"})
+    expected_set = sorted(set(expected_cols_sorted))
+    if actual_set != expected_set:
+        # id is optional, so it is never reported as extra
+        actual_set = set(actual_set)
+        expected_set = set(expected_cols_sorted)
+
+        extra = sorted(list(actual_set - expected_set))
+        missing = sorted(list(expected_set - actual_set))
+
+        err_msg = f"Sheet '{sheet}' column validation failed!"
+        if extra:
+            err_msg += f" Extra columns: {extra}"
+        if missing:
+            err_msg += f" Missing columns: {missing}"
+
+        raise ValueError(err_msg)
+
+
+def _clean_value(field, value):
+    """Convert and validate a raw sheet cell as the model field's Python value."""
+    if value is not None and not isinstance(value, str) and pd.isna(value):
+        value = None
+    elif isinstance(value, str):
+        value = value.strip()
+    elif isinstance(value, float) and isinstance(
+        field, (models.DecimalField, MoneyField)
+    ):
+        # Go through the shortest repr so 12.3 doesn't become 12.29999999
+        value = repr(value)
     try:
-        xl = pd.ExcelFile(file)
-    except Exception as e:
-        raise ValueError(f"Failed to open Excel file: {str(e)}")
-
-    imported_data = {}
-    sheet_names = xl.sheet_names
-
-    for sheet, expected_cols in EXPECTED_COLUMNS.items():
-        if sheet not in sheet_names:
-            # Case-insensitive check
-            sheet_lower = sheet.lower()
-            matched = [s for s in sheet_names if s.lower() == sheet_lower]
-            if matched:
-                sheet = matched[0]  # Use the actual sheet name
-            else:
-                raise ValueError(f"Required sheet '{sheet}' missing!")
-
-        try:
-            df = pd.read_excel(
-                xl, sheet_name=sheet, dtype=str
-            )  # Read as strings initially
-        except Exception as e:
-            raise ValueError(f"Failed to read sheet '{sheet}': {str(e)}")
-
-        # Clean column names (strip whitespace)
-        df.columns = df.columns.astype(str).str.strip()
-        actual_cols = sorted([str(col).lower() for col in df.columns])
-        expected_cols_sorted = sorted([str(col).lower() for col in expected_cols])
-        actual_set = sorted(set(actual_cols) - {"id"})
-        expected_set = sorted(set(expected_cols_sorted))
-        if actual_set != expected_set:
-            actual_set = set(actual_cols)
-            expected_set = set(expected_cols_sorted)
+        value = field.clean(value, None)
+    except ValidationError as err:
+        raise ValueError("; ".join(err.messages))
+    if (
+        isinstance(value, datetime.datetime)
+        and settings.USE_TZ
+        and timezone.is_naive(value)
+    ):
+        # Exports are written as naive UTC, so read them back the same way
+        value = timezone.make_aware(value, datetime.timezone.utc)
+    return value
+
+
+class BulkModelSync:
+    """
+    Diff incoming rows against one model's table and write only the changes.
+
+    Rows are matched on ``key_fields``, a natural key that is unique in the
+    table. Existing rows are loaded once into a ``{key: (pk, row digest)}``
+    map, incoming rows are split into creates, updates and unchanged rows by
+    their digests, and the writes go out through chunked ``bulk_create`` /
+    ``bulk_update``. Rows sharing a key behave like repeated
+    ``update_or_create`` calls: the last one wins. Once every row is in,
+    ``delete_unmatched`` removes the existing rows that none of them matched.
+
+    ``fields`` defaults to every concrete field except the primary key and
+    those in ``exclude``, which the import leaves to the database and does
+    not read from the sheet.
+
+    If ``on_change`` is set, it is called as ``on_change(removed, added)``
+    with the old and new values (ordered like ``fields``) of each batch of
+    rows created or updated, for state derived from the rows. Deletes go
+    through the ORM and send ``post_delete`` for every row instead.
+    """
 
-            extra = sorted(list(actual_set - expected_set))
-            missing = sorted(list(expected_set - actual_set))
+    # Whether rows are matched on the primary key they were exported with
+    uses_pk = False
+    exclude = ()
+    on_change = None
+
+    def __init__(self, model, key_fields, fields=None, batch_size=1000, exclude=None):
+        self.model = model
+        self.key_fields = tuple(key_fields)
+        if exclude is not None:
+            self.exclude = tuple(exclude)
+        if fields is None:
+            fields = [
+                f.attname
+                for f in model._meta.concrete_fields
+                if not f.primary_key and f.attname not in self.exclude
+            ]
+        self.fields = list(fields)
+        self.key_index = [self.fields.index(name) for name in self.key_fields]
+        self.batch_size = batch_size
+        self.existing = {}
+        # Primary keys of the existing rows that some incoming row matched
+        self.matched = set()
+        self.created = self.updated = self.skipped = self.deleted = 0
+
+    def key_of(self, values):
+        return tuple(values[i] for i in self.key_index)
+
+    def load_existing(self):
+        """Load every existing row in a single streamed query."""
+        rows = self.model.objects.values_list("pk", *self.fields).order_by()
+        for pk, *values in rows.iterator(chunk_size=self.batch_size):
+            self._remember(pk, values)
+
+    def _remember(self, pk, values):
+        self.existing[self.key_of(values)] = (pk, row_digest(values))
+
+    def apply(self, rows):
+        """
+        Apply an iterable of ``(pk, values)`` pairs, where ``values`` is
+        ordered like ``self.fields`` and ``pk`` is the primary key the row
+        was exported with, or None. Natural-key syncs ignore ``pk``.
+
+        Returns the number of rows consumed.
+        """
+        to_create = {}
+        to_update = {}
+        count = 0
+        for _, values in rows:
+            count += 1
+            key = self.key_of(values)
+            if key in to_create:
+                to_create[key] = values
+                continue
 
-            err_msg = f"Sheet '{sheet}' column validation failed!"
-            if extra:
-                err_msg += f" Extra columns: {extra}"
-            if missing:
-                err_msg += f" Missing columns: {missing}"
+            current = self.existing.get(key)
+            if current is None:
+                to_create[key] = values
+                continue
 
-            raise ValueError(err_msg)
+            pk, old_digest = current
+            self.matched.add(pk)
+            if pk in to_update:
+                # A second row for this key in the same batch
+                to_update[pk] = values
+            elif old_digest == row_digest(values):
+                self.skipped += 1
+            else:
+                to_update[pk] = values
+                self.updated += 1
+
+        self._create([(None, values) for values in to_create.values()])
+        self._update(to_update)
+        return count
+
+    def finish(self):
+        """Write whatever ``apply`` held back until the whole sheet was read."""
+
+    def delete_unmatched(self):
+        """Delete the existing rows no incoming row matched, by pk in chunks."""
+        stale = [pk for pk, _ in self.existing.values() if pk not in self.matched]
+        for start in range(0, len(stale), self.batch_size):
+            deleted, _ = self.model.objects.filter(
+                pk__in=stale[start : start + self.batch_size]
+            ).delete()
+            self.deleted += deleted
+        return self.deleted
+
+    def _build(self, values, pk=None):
+        obj = self.model(**dict(zip(self.fields, values)))
+        obj.pk = pk
+        return obj
+
+    def _create(self, rows):
+        """Insert ``(pk, values)`` rows; a None pk is assigned by the database."""
+        if not rows:
+            return
+        objs = [self._build(values, pk) for pk, values in rows]
+        created = self.model.objects.bulk_create(objs, batch_size=self.batch_size)
+        for obj, (_, values) in zip(created, rows):
+            if obj.pk is not None:
+                self._remember(obj.pk, values)
+                self.matched.add(obj.pk)
+        self.created += len(objs)
+        if self.on_change is not None:
+            self.on_change((), [values for _, values in rows])
+
+    def _update(self, pending):
+        if not pending:
+            return
+        if self.on_change is not None:
+            # Only the rows about to change are read back
+            self.on_change(
+                list(
+                    self.model.objects.filter(pk__in=list(pending))
+                    .order_by()
+                    .values_list(*self.fields)
+                ),
+                list(pending.values()),
+            )
+        objs = [self._build(values, pk=pk) for pk, values in pending.items()]
+        self.model.objects.bulk_update(objs, self.fields, batch_size=self.batch_size)
+        for pk, values in pending.items():
+            self._remember(pk, values)
+
+
+class CategorySync(BulkModelSync):
+    """
+    Categories, keyed by their (category, subcategory) pair. ``total_sum``
+    is recomputed from the ledger after the import instead of being read.
+    """
 
-        imported_data[sheet] = df
+    exclude = ("total_sum",)
 
-    return imported_data
+    def __init__(self, model, batch_size=1000):
+        super().__init__(model, CATEGORY_KEY, batch_size=batch_size)
 
 
-def delete_rows(df, model, batch_size=1000):
+class LedgerSync(BulkModelSync):
     """
-    Delete rows in batches for better performance with large datasets.
-    For Category model, matches on composite key: category + subcategory.
-    Optimized version using database operations.
+    Sync for a table without a unique natural key, such as the ledger.
+
+    Rows carrying the ``id`` they were exported with update that row, or
+    are inserted under that id if it is gone. Rows without an id are held
+    until ``finish``, after the whole sheet has been read: those whose
+    content equals an existing row that no id claimed are paired with it
+    one to one, so that a sheet without an id column re-imports without
+    duplicating anything, and the rest are inserted. They go in after the
+    table's sequence has been moved past the explicit ids, so the database
+    cannot hand them an id that is already taken.
     """
-    from django.db import transaction
-    from django.db.models import Q
-
-    # Ensure the DataFrame has the required columns
-    required_columns = ["category", "subcategory"]
-    if not all(col in df.columns for col in required_columns):
-        raise ValueError(f"DataFrame must contain columns: {required_columns}")
-
-    # Clean and prepare DataFrame data
-    df["category"] = df["category"].astype(str).str.strip()
-    df["subcategory"] = df["subcategory"].astype(str).str.strip()
-
-    # Create a list of Q objects for rows that SHOULD exist
-    q_filters = Q()
-    for _, row in df.iterrows():
-        q_filters |= Q(category=row["category"], subcategory=row["subcategory"])
-
-    # Get rows that are NOT in the DataFrame
-    # This is the inverse: rows that don't match any of the combinations in df
-    if q_filters:
-        # Note: This can be inefficient for very large df, but is database-optimized
-        qs_to_delete = model.objects.exclude(q_filters)
-    else:
-        # If df is empty, delete everything
-        qs_to_delete = model.objects.all()
-
-    # Get count before deletion
-    count_before = qs_to_delete.count()
-
-    # Delete in batches using iterator() for memory efficiency
-    deleted_count = 0
-    while True:
-        batch_ids = list(qs_to_delete.values_list("id", flat=True)[:batch_size])
-        if not batch_ids:
-            break
 
-        deleted, _ = model.objects.filter(id__in=batch_ids).delete()
-        deleted_count += deleted
+    uses_pk = True
+
+    def __init__(self, model, fields=None, batch_size=1000, exclude=None):
+        super().__init__(model, (), fields, batch_size, exclude)
+        # {row digest: [pk, ...]} of the existing rows
+        self.by_digest = {}
+        # (digest, values) of the rows without an id
+        self.unkeyed = []
+        self.inserted_pks = False
+
+    def load_existing(self):
+        rows = self.model.objects.values_list("pk", *self.fields).order_by()
+        for pk, *values in rows.iterator(chunk_size=self.batch_size):
+            digest = row_digest(values)
+            self.existing[pk] = (pk, digest)
+            self.by_digest.setdefault(digest, []).append(pk)
+
+    def _remember(self, pk, values):
+        self.existing[pk] = (pk, row_digest(values))
+
+    def apply(self, rows):
+        to_create = {}
+        to_update = {}
+        count = 0
+        for pk, values in rows:
+            count += 1
+            digest = row_digest(values)
+            if pk is None:
+                self.unkeyed.append((digest, values))
+                continue
+
+            current = self.existing.get(pk)
+            if current is None:
+                to_create[pk] = values
+                continue
 
-    return deleted_count
+            self.matched.add(pk)
+            if pk in to_update:
+                to_update[pk] = values
+            elif current[1] == digest:
+                self.skipped += 1
+            else:
+                to_update[pk] = values
+                self.updated += 1
+
+        self.inserted_pks = self.inserted_pks or bool(to_create)
+        self._create(list(to_create.items()))
+        self._update(to_update)
+        return count
+
+    def finish(self):
+        if self.inserted_pks:
+            # Explicit ids do not advance the table's sequence (PostgreSQL)
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), [self.model]):
+                    cursor.execute(sql)
+
+        new_rows = []
+        for digest, values in self.unkeyed:
+            candidates = self.by_digest.get(digest, [])
+            while candidates and candidates[-1] in self.matched:
+                candidates.pop()
+            if candidates:
+                self.matched.add(candidates.pop())
+                self.skipped += 1
+            else:
+                new_rows.append((None, values))
+        self.unkeyed = []
+        for start in range(0, len(new_rows), self.batch_size):
+            self._create(new_rows[start : start + self.batch_size])
 
 
-def sync_dataframes_to_models(dataframes_dict, model_mapping):
+def sync_dataframes_to_models(dataframes_dict, model_mapping, batch_size=1000):
     """
     Sync pandas DataFrames with Django models.
 
+    The DataFrames go through the same validation and bulk diff as an
+    uploaded workbook (see ``sync_sheets``).
+
     Args:
         dataframes_dict: dict of {model_name: dataframe}
         model_mapping: dict of {model_name: DjangoModelClass}
+        batch_size: rows per bulk INSERT / UPDATE statement
 
     Returns:
-        dict: Results summaryet
+        dict: Results summary
     """
-    results = {}
+    sheets = {}
+    for model_name, df in dataframes_dict.items():
+        if model_name not in model_mapping:
+            continue
+        df.columns = [str(col).strip().lower() for col in df.columns]
+        with phase("dataframe_build"):
+            records = df.to_dict(orient="records")
+        sheets[model_name] = (model_name, enumerate(records, start=2))
+
+    return sync_sheets(
+        sheets, {name: model_mapping[name] for name in sheets}, batch_size
+    )
+
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+# How each sheet's rows are matched to the rows already in its table
+SYNC_STRATEGIES = {
+    "Category": CategorySync,
+    "Transaction": LedgerSync,
+}
+
+
+class ImportReport:
+    """Row-level import errors, keeping at most ``limit`` of them."""
+
+    def __init__(self, limit=MAX_REPORTED_ERRORS):
+        self.limit = limit
+        self.errors = []
+        self.error_count = 0
+
+    def add(self, sheet, row, column, message):
+        self.error_count += 1
+        if len(self.errors) < self.limit:
+            self.errors.append(
+                {"sheet": sheet, "row": row, "column": column, "error": message}
+            )
+
+    @property
+    def full(self):
+        return self.error_count >= self.limit
+
+    def as_dict(self):
+        return {
+            "error_count": self.error_count,
+            "errors": self.errors,
+            "truncated": self.error_count > len(self.errors),
+        }
+
+
+class ImportValidationError(ValueError):
+    """Raised after an import is rolled back because some rows were invalid."""
+
+    def __init__(self, report):
+        self.report = report
+        super().__init__(
+            f"{report.error_count} invalid value(s) found, nothing was imported"
+        )
+
 
-    with transaction.atomic():
-        for model_name, df in dataframes_dict.items():
-            if model_name not in model_mapping:
+def open_workbook(file):
+    """Open ``file`` with openpyxl's read-only parser."""
+    try:
+        return load_workbook(file, read_only=True, data_only=True)
+    except Exception as e:
+        raise ValueError(f"Failed to open Excel file: {str(e)}")
+
+
+def read_sheet_headers(workbook, expected_columns):
+    """
+    Validate every required sheet from its header row alone.
+
+    Returns ``{model_name: (worksheet, {column_name: position})}``.
+    """
+    sheets = {}
+    for model_name, expected_cols in expected_columns.items():
+        sheet = find_sheet(model_name, workbook.sheetnames)
+        worksheet = workbook[sheet]
+        header = next(worksheet.iter_rows(max_row=1, values_only=True), ())
+        columns = [str(col).strip().lower() for col in header if col is not None]
+        validate_columns(sheet, columns, expected_cols)
+        sheets[model_name] = (worksheet, {col: i for i, col in enumerate(columns)})
+    return sheets
+
+
+def iter_sheet_records(worksheet, positions):
+    """Yield ``(row_number, {column: raw_value})`` for every non-empty data row."""
+    for row_number, row in enumerate(
+        worksheet.iter_rows(min_row=2, values_only=True), start=2
+    ):
+        if all(value is None for value in row):
+            continue
+        yield row_number, {
+            col: row[i] if i < len(row) else None for col, i in positions.items()
+        }
+
+
+def _clean_pk(field, value):
+    """The primary key a row was exported with, or None for a new row."""
+    if isinstance(value, str):
+        value = value.strip()
+    if value is None or value == "" or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return _clean_value(field, value)
+
+
+def _category_ids(keys=None):
+    """``{(category, subcategory): pk}``, optionally limited to ``keys``."""
+    ids = {
+        (category, subcategory): pk
+        for category, subcategory, pk in Category.objects.values_list(
+            *CATEGORY_KEY, "pk"
+        )
+    }
+    if keys is not None:
+        ids = {key: pk for key, pk in ids.items() if key in keys}
+    return ids
+
+
+def _rollup_changes(fields):
+    """``on_change`` for a Transaction sync: move the rows' rollup buckets."""
+    when, category, amount = (
+        fields.index(name) for name in ("datetime", "category_ref_id", "amount")
+    )
+
+    def on_change(removed, added):
+        apply_rollup_deltas(
+            chain(
+                ((row[when], row[category], -row[amount], -1) for row in removed),
+                ((row[when], row[category], row[amount], 1) for row in added),
+            )
+        )
+
+    return on_change
+
+
+def sync_sheets(
+    sheets,
+    model_mapping,
+    batch_size=IMPORT_BATCH_SIZE,
+    report=None,
+    progress=None,
+):
+    """
+    Validate sheet rows and sync them into their models in bulk.
+
+    ``sheets`` maps model names to ``(sheet title, rows)``, where ``rows``
+    yields ``(row_number, {column: raw_value})``. Each cell is cleaned by the
+    field its column is exported from, Category pairs are resolved to
+    ``category_ref`` ids, and the typed rows are fed to the model's entry in
+    ``SYNC_STRATEGIES`` ``batch_size`` at a time. Rows missing from a sheet
+    are deleted after every sheet has been written, dependents first, so
+    that no Category is removed while transactions still point at it. A
+    sheet whose digest matches the fingerprint stored by the last export or
+    import, with no write to the ledger since, has no rows to delete and
+    skips that pass. Category totals are then recomputed from the ledger.
+
+    Invalid values are collected in ``report``; if there are any, the whole
+    sync is rolled back with ``ImportValidationError``. ``progress``, if
+    given, is called as ``progress(model_name, rows_read)`` after every batch.
+
+    Returns ``{model_name: {created, updated, skipped, deleted, total,
+    unchanged}}``; Category's also has ``totals_recomputed``.
+    """
+    report = report or ImportReport()
+    results = {}
+    pending_deletes = []
+    digests = {}
+    category_ids = None
+
+    # Reading and cleaning rows is timed as "validation", writes as "sync"
+    with transaction.atomic(), phase("validation"):
+        start_version = get_version(LEDGER)
+        stored = stored_digests(start_version)
+        for model_name, Model in model_mapping.items():
+            title, rows = sheets[model_name]
+            pk_name = Model._meta.pk.attname
+            sync = SYNC_STRATEGIES[model_name](Model, batch_size=batch_size)
+            if Model is Transaction:
+                sync.on_change = _rollup_changes(sync.fields)
+            # Columns the sync leaves to the database are not even validated
+            columns = [
+                (column, resolve_field(Model, lookup))
+                for column, lookup in export_columns(Model)
+                if column != pk_name and column not in sync.exclude
+            ]
+            with phase("query"):
+                sync.load_existing()
+            refers_to_category = "category_ref_id" in sync.fields
+            if refers_to_category and category_ids is None:
+                category_ids = _category_ids()
+
+            # The exported id is read too when the sync matches rows on it
+            cleaned_count = len(columns) + (1 if sync.uses_pk else 0)
+            digested = digest_columns(Model)
+            digest = digests[model_name] = SheetDigest()
+            keep_keys = set()
+            batch = []
+            total = 0
+            for row_number, record in rows:
+                total += 1
+                cleaned = {}
+                if sync.uses_pk:
+                    try:
+                        cleaned[pk_name] = _clean_pk(
+                            Model._meta.pk, record.get(pk_name)
+                        )
+                    except ValueError as err:
+                        report.add(title, row_number, pk_name, str(err))
+                for column, field in columns:
+                    try:
+                        cleaned[column] = _clean_value(field, record.get(column))
+                    except ValueError as err:
+                        report.add(title, row_number, column, str(err))
+                if len(cleaned) < cleaned_count:
+                    if report.full:
+                        break
+                    continue
+                digest.add(tuple(cleaned[column] for column in digested))
+
+                if refers_to_category:
+                    pair = tuple(cleaned[name] for name in CATEGORY_KEY)
+                    if pair not in category_ids:
+                        report.add(
+                            title,
+                            row_number,
+                            "subcategory",
+                            f"Unknown category '{pair[0]}' / '{pair[1]}'",
+                        )
+                        if report.full:
+                            break
+                        continue
+                    cleaned["category_ref_id"] = category_ids[pair]
+
+                values = tuple(cleaned[name] for name in sync.fields)
+                if Model is Category:
+                    keep_keys.add(sync.key_of(values))
+                batch.append((cleaned.get(pk_name), values))
+                if len(batch) >= batch_size:
+                    # Keep validating after the first error, but stop writing
+                    if not report.error_count:
+                        with phase("sync"):
+                            sync.apply(batch)
+                    batch = []
+                    if progress:
+                        progress(model_name, total)
+
+            if report.error_count:
+                if report.full:
+                    break
                 continue
 
-            Model = model_mapping[model_name]
-            created = updated = skipped = 0
-            df.columns = [i.lower() for i in df.columns]
-            # Get model's field names for dataframe alignment
-            model_fields = [f.name for f in Model._meta.fields if not f.primary_key]
-            df = df[model_fields]
-            # Handle each row in dataframe
-            deleted = delete_rows(df, Model)
-            for _, row in df.iterrows():
-                row_dict = row.to_dict()
-
-                # Filter row data to match model fields
-                # Determine identifier field (first unique field or use 'id')
-
-                obj, is_created = Model.objects.update_or_create(
-                    category=row_dict[
-                        "category"
-                    ],  # Lookup fields (for finding existing record)
-                    subcategory=row_dict["subcategory"],
-                    defaults=row_dict,  # Fields to update/create
-                )
-
-                if is_created:
-                    created += 1
-                else:
-                    updated += 1
+            with phase("sync"):
+                sync.apply(batch)
+                sync.finish()
+            if progress:
+                progress(model_name, total)
+            if Model is Category:
+                # Later sheets may only refer to the categories in this one
+                category_ids = _category_ids(keep_keys)
+
+            unchanged = stored.get(model_name) == digest.hexdigest
+            if not unchanged:
+                pending_deletes.append((model_name, sync))
             results[model_name] = {
-                "created": created,
-                "updated": updated,
-                "deleted": deleted,
-                "total": len(df),
+                "created": sync.created,
+                "updated": sync.updated,
+                "skipped": sync.skipped,
+                "deleted": 0,
+                "total": total,
+                "unchanged": unchanged,
             }
 
+        if report.error_count:
+            raise ImportValidationError(report)
+
+        with phase("sync"):
+            for model_name, sync in reversed(pending_deletes):
+                try:
+                    deleted = sync.delete_unmatched()
+                except ProtectedError as err:
+                    raise ValueError(
+                        f"Cannot delete {model_name} rows that are still referenced: "
+                        f"{', '.join(str(obj) for obj in list(err.protected_objects)[:5])}"
+                    )
+                results[model_name]["deleted"] = deleted
+
+            category_result = results.get("Category")
+            if category_result and (
+                category_result["created"] or category_result["deleted"]
+            ):
+                bump_version(CATEGORIES)
+
+            transaction_result = results.get("Transaction")
+            if transaction_result and (
+                transaction_result["updated"] or transaction_result["deleted"]
+            ):
+                bump_version(LEDGER_REWRITES)
+
+            # One UPDATE, and only for the categories whose total is off
+            totals_fixed = recompute_category_totals()
+            if category_result:
+                category_result["totals_recomputed"] = totals_fixed
+
+            if totals_fixed or any(
+                result["created"] or result["updated"] or result["deleted"]
+                for result in results.values()
+            ):
+                bump_version(LEDGER)
+
+            # Fingerprints still current need no rewrite
+            version = get_version(LEDGER)
+            store_digests(
+                {
+                    name: digest
+                    for name, digest in digests.items()
+                    if version != start_version or stored.get(name) != digest.hexdigest
+                },
+                version,
+            )
+
     return results
 
 
+def import_workbook(
+    file,
+    model_mapping,
+    batch_size=IMPORT_BATCH_SIZE,
+    report=None,
+    progress=None,
+):
+    """
+    Stream an exported workbook into the database.
+
+    Headers of all sheets are checked before any data row is read. Rows are
+    then parsed with openpyxl's read-only reader and handed to
+    ``sync_sheets``, which validates and writes them in batches.
+
+    Returns the same per-model results as ``sync_dataframes_to_models``.
+    """
+    with phase("workbook_read"):
+        workbook = open_workbook(file)
+    try:
+        expected_columns = get_model_columns(list(model_mapping))
+        with phase("validation"):
+            headers = read_sheet_headers(workbook, expected_columns)
+        sheets = {
+            model_name: (
+                worksheet.title,
+                timed_iter("workbook_read", iter_sheet_records(worksheet, positions)),
+            )
+            for model_name, (worksheet, positions) in headers.items()
+        }
+        return sync_sheets(sheets, model_mapping, batch_size, report, progress)
+    finally:
+        workbook.close()
+
+
 # views.py
 
 
@@ -302,33 +1244,48 @@ def sync_dataframes_to_models(dataframes_dict, model_mapping):
 @require_POST
 def upload_excel(request):
     if "file" not in request.FILES:
-        return JsonResponse({"status": "error", "msg": "No file provided"}, status=400)
+        return json_response({"status": "error", "msg": "No file provided"}, status=400)
 
     file = request.FILES["file"]
 
-    # Validate file extension
-    if not file.name.endswith((".xlsx", ".xls")):
-        return JsonResponse(
-            {"status": "error", "msg": "Only Excel files are allowed"}, status=400
+    # openpyxl reads only the OOXML format, so legacy .xls is refused here
+    # rather than failing in the import job
+    if not file.name.lower().endswith(".xlsx"):
+        return json_response(
+            {"status": "error", "msg": "Only Excel .xlsx files are allowed"},
+            status=400,
         )
 
     try:
-        data = import_excel_strict(file)
-        results = sync_dataframes_to_models(
-            data, {"Category": Category, "Transaction": Transaction}
+        job = enqueue_import(file)
+    except OperationalError:
+        # On SQLite a running import holds the write lock until it commits
+        response = json_response(
+            {
+                "status": "error",
+                "msg": "Another import is in progress, try again shortly",
+            },
+            status=503,
         )
-        print(results)
+        response["Retry-After"] = "5"
+        return response
+    return json_response(
+        {
+            "status": "queued",
+            "msg": "Import queued",
+            "job_id": job.pk,
+            "status_url": reverse("excel_import_status", args=[job.pk]),
+        },
+        status=202,
+    )
 
-        return JsonResponse(
-            {
-                "status": "ok",
-                "msg": "Import successful",
-                "sheets_imported": list(data.keys()),
-                "row_counts": {sheet: len(df) for sheet, df in data.items()},
-            }
+
+@require_GET
+def import_job_status(request, job_id):
+    try:
+        job = ImportJob.objects.get(pk=job_id)
+    except ImportJob.DoesNotExist:
+        return json_response(
+            {"status": "error", "msg": f"Import job {job_id} not found"}, status=404
         )
-    except ValueError as err:
-        return JsonResponse({"status": "error", "msg": str(err)}, status=400)
-    except Exception as err:
-        # Log unexpected errors
-        return JsonResponse({"status": "error", "msg": err}, status=500)
+    return json_response(job_status(job), request=request)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class UiConfig(AppConfig):
     name = "ui"
+
+    def ready(self):
+        from . import signals  # noqa: F401
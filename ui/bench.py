@@ -0,0 +1,180 @@
+"""
+Helpers shared by the benchmark management commands.
+
+Benchmarks never touch the configured database: ``benchmark_database``
+creates a throwaway test database the same way the test runner does, and
+``generate_ledger`` fills it with a reproducible synthetic ledger.
+"""
+
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.db.models import Sum
+
+from .caching import CATEGORIES, LEDGER, bump_version
+from .models import Category, Transaction
+from .rollups import rebuild_rollups
+
+
+@contextmanager
+def benchmark_database(keepdb=False):
+    """
+    Run the enclosed block against a fresh test database.
+
+    SQLite test databases default to a shared in-memory database; a
+    temporary file is used instead so that several threads can open their
+    own connections, as the web workers do.
+    """
+    settings_dict = connection.settings_dict
+    test_settings = settings_dict.setdefault("TEST", {})
+    tmpdir = None
+    if connection.vendor == "sqlite" and not test_settings.get("NAME"):
+        tmpdir = tempfile.mkdtemp(prefix="finance-bench-")
+        test_settings["NAME"] = os.path.join(tmpdir, "bench.sqlite3")
+
+    old_name = settings_dict["NAME"]
+    connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False, keepdb=keepdb
+    )
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+        if tmpdir:
+            test_settings.pop("NAME", None)
+            for name in os.listdir(tmpdir):
+                os.remove(os.path.join(tmpdir, name))
+            os.rmdir(tmpdir)
+
+
+def generate_ledger(
+    categories=10,
+    subcategories=10,
+    transactions=100_000,
+    days=365,
+    end=None,
+    seed=0,
+    batch_size=5000,
+):
+    """
+    Create ``categories`` x ``subcategories`` Category rows and
+    ``transactions`` Transaction rows spread uniformly over ``days`` days
+    ending at ``end`` (default: now), then set every ``total_sum`` and
+    rebuild the rollups.
+
+    The same ``seed`` always produces the same ledger.
+    """
+    rng = random.Random(seed)
+    end = end or datetime.now(timezone.utc).replace(microsecond=0)
+    span = int(timedelta(days=days).total_seconds())
+
+    pairs = [
+        (f"Category {c}", f"Subcategory {s}")
+        for c in range(categories)
+        for s in range(subcategories)
+    ]
+    Category.objects.bulk_create(
+        [Category(category=c, subcategory=s) for c, s in pairs],
+        batch_size=batch_size,
+    )
+    category_ids = list(Category.objects.order_by("pk").values_list("pk", flat=True))
+
+    remaining = transactions
+    while remaining > 0:
+        size = min(batch_size, remaining)
+        batch = []
+        for _ in range(size):
+            batch.append(
+                Transaction(
+                    datetime=end - timedelta(seconds=rng.randrange(span)),
+                    category_ref_id=rng.choice(category_ids),
+                    amount=Decimal(rng.randrange(1, 100_000)) / 100,
+                )
+            )
+        Transaction.objects.bulk_create(batch)
+        remaining -= size
+
+    totals = dict(
+        Transaction.objects.order_by()
+        .values("category_ref")
+        .annotate(total=Sum("amount"))
+        .values_list("category_ref", "total")
+    )
+    rows = list(Category.objects.all())
+    for row in rows:
+        row.total_sum = totals.get(row.pk, 0)
+    Category.objects.bulk_update(rows, ["total_sum"], batch_size=batch_size)
+    rebuild_rollups(batch_size=batch_size)
+    bump_version(CATEGORIES)
+    bump_version(LEDGER)
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+
+def time_call(func, repeat):
+    """Call ``func`` ``repeat`` times and return the latencies in ms."""
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def percentiles(latencies):
+    """Summarise a list of latencies (ms) as min/p50/p95/p99/max/mean."""
+    ordered = sorted(latencies)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        "n": len(ordered),
+        "min": round(ordered[0], 3),
+        "p50": round(pick(0.50), 3),
+        "p95": round(pick(0.95), 3),
+        "p99": round(pick(0.99), 3),
+        "max": round(ordered[-1], 3),
+        "mean": round(statistics.fmean(ordered), 3),
+    }
+
+
+class QueryCounter:
+    """
+    Counts the queries run on every database connection, from any thread.
+
+    Async views run their ORM calls in worker threads with connections of
+    their own, which ``CaptureQueriesContext`` on the calling thread would
+    miss. Install before those connections are opened.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def _add_to(self, sender, connection, **kwargs):
+        connection.execute_wrappers.append(self)
+
+    def install(self):
+        connection.execute_wrappers.append(self)
+        connection_created.connect(self._add_to, weak=False)
+
+    def uninstall(self):
+        connection_created.disconnect(self._add_to)
+        if self in connection.execute_wrappers:
+            connection.execute_wrappers.remove(self)
@@ -0,0 +1,213 @@
+"""
+Process-local caches kept consistent across workers through DataVersion.
+
+Every write path that changes cached data bumps a named counter in the
+database inside its own transaction. Readers compare the counter against
+the version their cache was built from, so a single indexed lookup per
+request is enough to pick up changes made by any worker.
+"""
+
+import threading
+import zlib
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import F
+from django.http import HttpResponse, HttpResponseNotModified
+
+from .models import Category, DataVersion
+from .responses import dumps
+
+# Bumped whenever the set of (category, subcategory) pairs changes
+CATEGORIES = "categories"
+# Bumped by every write to transactions, category totals or categories
+LEDGER = "ledger"
+# Bumped when stored transactions are updated or deleted, on top of LEDGER;
+# caches that only ever append new rows reload when it moves
+LEDGER_REWRITES = "ledger-rewrites"
+
+
+def _version_query(name):
+    return DataVersion.objects.filter(name=name).values_list("value", flat=True)
+
+
+def get_version(name):
+    return _version_query(name).first() or 0
+
+
+async def aget_version(name):
+    return await _version_query(name).afirst() or 0
+
+
+def bump_version(name):
+    """Increment the ``name`` counter; call it inside the writing transaction."""
+    if not DataVersion.objects.filter(name=name).update(value=F("value") + 1):
+        DataVersion.objects.get_or_create(name=name, defaults={"value": 1})
+
+
+class CategoryIndex:
+    """
+    Immutable snapshot of the category tree.
+
+    ``tree`` maps each category to a frozenset of its subcategories, ``ids``
+    maps ``(category, subcategory)`` to the Category pk, and ``json`` is the
+    serialised ``/api/category`` body with its ``etag``.
+    """
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.ids = {}
+        subcategories = {}
+        for pk, category, subcategory in rows:
+            self.ids[(category, subcategory)] = pk
+            subcategories.setdefault(category, []).append(subcategory)
+        self.lists = subcategories
+        self.tree = {
+            category: frozenset(subs) for category, subs in subcategories.items()
+        }
+        self.json = dumps(subcategories)
+        self.etag = f'"categories-{version}"'
+
+
+_category_index = None
+_category_lock = threading.Lock()
+
+
+def category_index():
+    """Return the current CategoryIndex, rebuilding it if the version moved."""
+    global _category_index
+    # Read the version before the rows: a concurrent write then makes the
+    # snapshot look older than it is, never newer
+    version = get_version(CATEGORIES)
+    index = _category_index
+    if index is not None and index.version == version:
+        return index
+
+    with _category_lock:
+        index = _category_index
+        if index is None or index.version != version:
+            rows = Category.objects.order_by("pk").values_list(
+                "pk", "category", "subcategory"
+            )
+            index = _category_index = CategoryIndex(version, list(rows))
+    return index
+
+
+async def acategory_index():
+    """Async ``category_index``; concurrent rebuilds are harmless, not locked."""
+    global _category_index
+    version = await aget_version(CATEGORIES)
+    index = _category_index
+    if index is not None and index.version == version:
+        return index
+
+    rows = Category.objects.order_by("pk").values_list("pk", "category", "subcategory")
+    index = CategoryIndex(version, [row async for row in rows])
+    with _category_lock:
+        # Never replace a snapshot built from a newer version
+        if _category_index is None or _category_index.version < version:
+            _category_index = index
+    return index
+
+
+def etag_matches(request, etag):
+    """True if the request's ``If-None-Match`` header covers ``etag``."""
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU of serialised response bodies with hit/miss counters.
+
+    Keys carry the data version the body was built from, so entries are
+    never invalidated explicitly: stale versions simply age out.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return body
+
+    def set(self, key, body):
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+response_cache = ResponseCache(getattr(settings, "RESPONSE_CACHE_ENTRIES", 256))
+
+
+def _response_key(request, endpoint, version):
+    params = request.GET.urlencode()
+    etag = f'"{endpoint}-{version}-{zlib.crc32(params.encode()):08x}"'
+    return (endpoint, params, version), etag
+
+
+def _body_response(body, etag, content_type):
+    if body is None:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type=content_type)
+    response["ETag"] = etag
+    # Clients may keep the body but must revalidate before reusing it
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+def cached_response(request, endpoint, build, content_type="application/json"):
+    """
+    Serve ``build()`` (which returns bytes) with a strong ETag and a 304 for
+    matching conditional requests.
+
+    The body depends only on the endpoint, its query string and the LEDGER
+    version, so it is cached per worker under that key. The version is read
+    before ``build`` runs: a concurrent write makes the body look older than
+    it is, and the next request rebuilds it.
+    """
+    key, etag = _response_key(request, endpoint, get_version(LEDGER))
+    body = None
+    if not etag_matches(request, etag):
+        body = response_cache.get(key)
+        if body is None:
+            body = build()
+            response_cache.set(key, body)
+    return _body_response(body, etag, content_type)
+
+
+async def acached_response(request, endpoint, build, content_type="application/json"):
+    """``cached_response`` for async views; ``build`` is a coroutine function."""
+    key, etag = _response_key(request, endpoint, await aget_version(LEDGER))
+    body = None
+    if not etag_matches(request, etag):
+        body = response_cache.get(key)
+        if body is None:
+            body = await build()
+            response_cache.set(key, body)
+    return _body_response(body, etag, content_type)
@@ -0,0 +1,266 @@
+"""
+Process-local columnar copy of the ledger for analytics.
+
+LedgerColumns holds every transaction as three NumPy arrays: epoch seconds
+(int64), amount in cents (int64) and Category pk (int32), plus the calendar
+month of each row (int32, months since 1970-01), which is too slow to derive
+per query. It is loaded once
+and then kept current from the DataVersion counters: when only LEDGER moved,
+rows with an id above the last one loaded are appended; when
+LEDGER_REWRITES moved, it is reloaded. An append misses rows that
+concurrent writers commit below an id already loaded (not on SQLite, which
+commits in id order), so an appended snapshot is reloaded in full once it
+is ``COLUMNAR_RELOAD_SECONDS`` old. The analytics functions below filter and
+group those arrays without touching the ORM.
+"""
+
+import threading
+from datetime import date, datetime, time, timezone
+from time import monotonic
+
+import numpy as np
+from django.conf import settings
+from django.db.models import BigIntegerField, ExpressionWrapper, F, Func
+
+from .caching import LEDGER, LEDGER_REWRITES, get_version
+from .models import Transaction
+
+LOAD_CHUNK_SIZE = 20_000
+SECONDS_PER_DAY = 86_400
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+class EpochSeconds(Func):
+    """Seconds since 1970-01-01 UTC of a datetime column, computed in SQL."""
+
+    output_field = BigIntegerField()
+    template = "CAST(EXTRACT(EPOCH FROM %(expressions)s) AS BIGINT)"
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # Django stores datetimes as UTC text that strftime() parses
+        return self.as_sql(
+            compiler,
+            connection,
+            template="CAST(strftime('%%%%s', %(expressions)s) AS INTEGER)",
+            **extra_context,
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection, template="UNIX_TIMESTAMP(%(expressions)s)"
+        )
+
+
+class LedgerColumns:
+    """Immutable snapshot of the ledger as parallel NumPy arrays."""
+
+    def __init__(self, versions, max_id, timestamps, cents, categories):
+        self.versions = versions
+        self.max_id = max_id
+        self.timestamps = timestamps
+        self.cents = cents
+        self.categories = categories
+        self.months = _months(timestamps)
+        # When the rows were last read in full, on the monotonic clock, and
+        # whether rows were appended since
+        self.loaded_at = monotonic()
+        self.extended = False
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def appended(self, versions, max_id, timestamps, cents, categories):
+        """A new snapshot with rows added after this one's."""
+        columns = LedgerColumns(versions, max_id, timestamps, cents, categories)
+        for name in ("timestamps", "cents", "categories", "months"):
+            setattr(
+                columns,
+                name,
+                np.concatenate([getattr(self, name), getattr(columns, name)]),
+            )
+        columns.loaded_at = self.loaded_at
+        columns.extended = True
+        return columns
+
+
+def _months(timestamps):
+    return timestamps.astype("datetime64[s]").astype("datetime64[M]").astype(np.int32)
+
+
+def _load(after_id=0):
+    """``(max_id, timestamps, cents, categories)`` for rows above ``after_id``."""
+    # The database converts each row, so no Python objects are built for it
+    rows = (
+        Transaction.objects.filter(id__gt=after_id)
+        .order_by("id")
+        .annotate(
+            epoch=EpochSeconds("datetime"),
+            # The raw column, without MoneyField's Decimal conversion
+            cents=ExpressionWrapper(F("amount"), output_field=BigIntegerField()),
+        )
+        .values_list("id", "epoch", "cents", "category_ref_id")
+    )
+    loaded = np.fromiter(
+        rows.iterator(chunk_size=LOAD_CHUNK_SIZE),
+        dtype=[
+            ("id", np.int64),
+            ("epoch", np.int64),
+            ("cents", np.int64),
+            ("category", np.int32),
+        ],
+    )
+    return (
+        int(loaded["id"][-1]) if len(loaded) else after_id,
+        loaded["epoch"].copy(),
+        loaded["cents"].copy(),
+        loaded["category"].copy(),
+    )
+
+
+_ledger_columns = None
+_ledger_lock = threading.Lock()
+
+
+def _fresh(columns):
+    """Whether ``columns`` may be served or extended without a full reload."""
+    if columns is None:
+        return False
+    max_age = getattr(settings, "COLUMNAR_RELOAD_SECONDS", 300)
+    return not (
+        columns.extended and max_age and monotonic() - columns.loaded_at > max_age
+    )
+
+
+def ledger_columns():
+    """Return the current LedgerColumns, loading or extending it as needed."""
+    global _ledger_columns
+    # Versions are read before the rows, as for the category index
+    versions = (get_version(LEDGER), get_version(LEDGER_REWRITES))
+    columns = _ledger_columns
+    if _fresh(columns) and columns.versions == versions:
+        return columns
+
+    with _ledger_lock:
+        columns = _ledger_columns
+        if not _fresh(columns):
+            columns = None
+        elif columns.versions == versions:
+            return columns
+        elif columns.versions[1] == versions[1]:
+            columns = columns.appended(versions, *_load(columns.max_id))
+        else:
+            columns = None
+        if columns is None:
+            columns = LedgerColumns(versions, *_load())
+        _ledger_columns = columns
+    return columns
+
+
+def select(columns, start=None, end=None, category_ids=None):
+    """
+    Boolean mask of the rows between the dates ``start`` and ``end``
+    (inclusive, UTC) whose Category pk is in ``category_ids``.
+    """
+    mask = np.ones(len(columns), bool)
+    if start is not None:
+        mask &= columns.timestamps >= _epoch(start)
+    if end is not None:
+        mask &= columns.timestamps < _epoch(end) + SECONDS_PER_DAY
+    if category_ids is not None:
+        mask &= np.isin(columns.categories, np.array(category_ids, np.int32))
+    return mask
+
+
+def _epoch(day):
+    return int(datetime.combine(day, time.min, tzinfo=timezone.utc).timestamp())
+
+
+def _group_sum(keys, cents):
+    """``(keys present, cents per key, rows per key)``, keys sorted."""
+    if not len(keys):
+        return keys, np.empty(0, np.int64), np.empty(0, np.int64)
+    # Keys here are months, days or pks: a dense range, so counting into
+    # one bin per possible key beats sorting them
+    low = int(keys.min())
+    offsets = keys - low
+    # Float sums of whole cents are exact below 2**53
+    totals = np.bincount(offsets, weights=cents)
+    counts = np.bincount(offsets)
+    present = np.flatnonzero(counts)
+    return present + low, totals[present].astype(np.int64), counts[present]
+
+
+def monthly_totals(columns, mask, by_category=False):
+    """
+    ``[(month start, category pk or None, cents, count)]`` per calendar month,
+    split by category when ``by_category`` is set.
+    """
+    months = columns.months[mask].astype(np.int64)
+    cents = columns.cents[mask]
+    if not by_category:
+        unique, totals, counts = _group_sum(months, cents)
+        return [
+            (_month_start(month), None, int(total), int(count))
+            for month, total, count in zip(unique, totals, counts)
+        ]
+    categories = columns.categories[mask].astype(np.int64)
+    width = int(categories.max()) + 1 if len(categories) else 1
+    unique, totals, counts = _group_sum(months * width + categories, cents)
+    return [
+        (_month_start(key // width), int(key % width), int(total), int(count))
+        for key, total, count in zip(unique, totals, counts)
+    ]
+
+
+def _month_start(month):
+    # Months since 1970-01
+    years, months = divmod(int(month), 12)
+    return date(1970 + years, months + 1, 1)
+
+
+def category_totals(columns, mask):
+    """``[(category pk, cents, count)]`` ordered by pk."""
+    unique, totals, counts = _group_sum(columns.categories[mask], columns.cents[mask])
+    return [
+        (int(pk), int(total), int(count))
+        for pk, total, count in zip(unique, totals, counts)
+    ]
+
+
+def daily_moving_average(columns, mask, window, start=None, end=None):
+    """
+    ``[(day, cents, moving average in cents)]`` for every day from ``start``
+    to ``end`` (default: the first and last day with a transaction), where
+    the average covers the ``window`` days ending on that day.
+
+    ``mask`` should not restrict dates: the days before ``start`` are read
+    so that the first averages see their full window.
+    """
+    days = columns.timestamps[mask] // SECONDS_PER_DAY
+    cents = columns.cents[mask]
+    if start is None or end is None:
+        if not len(days):
+            return []
+        first, last = int(days.min()), int(days.max())
+    if start is not None:
+        first = _epoch(start) // SECONDS_PER_DAY
+    if end is not None:
+        last = _epoch(end) // SECONDS_PER_DAY
+    if last < first:
+        return []
+
+    # Dense daily totals from window - 1 days before the range
+    origin = first - (window - 1)
+    in_range = (days >= origin) & (days <= last)
+    daily = np.bincount(
+        days[in_range] - origin,
+        weights=cents[in_range],
+        minlength=last - origin + 1,
+    )
+    cumulative = np.concatenate([[0.0], np.cumsum(daily)])
+    averages = (cumulative[window:] - cumulative[:-window]) / window
+    totals = daily[window - 1 :]
+    return [
+        (date.fromordinal(EPOCH_ORDINAL + first + i), int(total), float(average))
+        for i, (total, average) in enumerate(zip(totals, averages))
+    ]
@@ -0,0 +1,115 @@
+from decimal import Decimal, InvalidOperation
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.core.validators import (
+    DecimalValidator,
+    MaxValueValidator,
+    MinValueValidator,
+)
+from django.db import models
+
+# Minor units per major unit, as a power of ten
+MONEY_DECIMAL_PLACES = 2
+_QUANTUM = Decimal(1).scaleb(-MONEY_DECIMAL_PLACES)
+# Largest amount whose cents fit a signed 64-bit BIGINT
+MAX_MONEY = Decimal(2**63 - 1).scaleb(-MONEY_DECIMAL_PLACES)
+
+
+def cents(amount):
+    """``amount`` (Decimal, int, float or str) rounded to whole cents."""
+    return int(to_money(amount).scaleb(MONEY_DECIMAL_PLACES))
+
+
+def parse_money(value):
+    """Parse ``value`` as a finite Decimal, unrounded; raises ValueError."""
+    try:
+        # Floats go through their shortest repr so 12.3 stays 12.3
+        value = Decimal(repr(value) if isinstance(value, float) else value)
+    except (InvalidOperation, TypeError, ValueError):
+        raise ValueError(f"{value!r} is not a number")
+    if not value.is_finite():
+        raise ValueError(f"{value!r} is not a finite number")
+    return value
+
+
+def to_money(value):
+    """Parse ``value`` as a Decimal rounded to whole cents; raises ValueError."""
+    value = parse_money(value)
+    try:
+        return value.quantize(_QUANTUM)
+    except InvalidOperation:
+        raise ValueError(f"{value!r} is too large")
+
+
+class MoneyField(models.BigIntegerField):
+    """
+    An amount of money stored as a BIGINT count of cents.
+
+    Python code sees Decimals with two decimal places, as it did when these
+    columns were DecimalFields, so API, export and import formats are
+    unchanged. The database sums plain integers, and rows are read without
+    the Decimal converters SQLite needs for DECIMAL columns. Expressions
+    that add a Python amount to such a column must add ``cents(amount)``.
+    """
+
+    description = "Amount of money, stored in cents"
+    default_error_messages = {
+        "invalid": "“%(value)s” value must be a decimal number.",
+    }
+    decimal_places = MONEY_DECIMAL_PLACES
+    # Whole digits of the largest BIGINT, so Arrow and forms can size it
+    max_digits = 19
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return Decimal(value).scaleb(-self.decimal_places)
+
+    def to_python(self, value):
+        if value is None or value == "":
+            return None
+        try:
+            value = parse_money(value)
+        except ValueError:
+            raise ValidationError(
+                self.error_messages["invalid"],
+                code="invalid",
+                params={"value": value},
+            )
+        try:
+            exact = value.quantize(_QUANTUM)
+        except InvalidOperation:
+            return value
+        # 12.300 is 12.30; 10.255 is left for DecimalValidator to reject
+        return exact if exact == value else value
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        # The API and the Excel import reject amounts finer than a cent;
+        # only internal writers (generators, shell) can reach this rounding
+        return cents(value)
+
+    @property
+    def validators(self):
+        # IntegerField's range validators would compare the Decimal amount
+        # against BIGINT bounds meant for cents
+        return [
+            *self.default_validators,
+            DecimalValidator(self.max_digits, self.decimal_places),
+            MinValueValidator(-MAX_MONEY),
+            MaxValueValidator(MAX_MONEY),
+            *self._validators,
+        ]
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(
+            self,
+            **{
+                "form_class": forms.DecimalField,
+                "max_digits": self.max_digits,
+                "decimal_places": self.decimal_places,
+                **kwargs,
+            },
+        )
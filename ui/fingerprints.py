@@ -0,0 +1,80 @@
+"""
+Content digests of workbook rows and sheets, for incremental re-imports.
+
+A row digest hashes a row's typed values in a canonical text form, so the
+values read back from an exported workbook digest the same as the values
+they were exported from. A sheet digest is the sum of its row digests: it
+does not depend on row order, so the export can compute it in table order
+and the import in sheet order.
+
+The Excel export and every successful import store each sheet's digest in
+SheetFingerprint together with the LEDGER version it describes. An import
+whose sheet digests to the stored value, while the LEDGER version has not
+moved since, has nothing to delete from that table.
+"""
+
+from datetime import datetime, timezone
+from decimal import Decimal
+from hashlib import blake2b
+
+from .models import SheetFingerprint
+
+DIGEST_BYTES = 16
+_MODULUS = 1 << (8 * DIGEST_BYTES)
+
+
+def _canonical(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        # Workbooks hold timestamps to the second
+        return value.replace(microsecond=0).isoformat()
+    if isinstance(value, Decimal):
+        return format(value.normalize(), "f")
+    return str(value)
+
+
+def row_digest(values):
+    """Stable integer digest of a tuple of typed values."""
+    data = "\x1f".join(_canonical(value) for value in values).encode()
+    return int.from_bytes(blake2b(data, digest_size=DIGEST_BYTES).digest(), "big")
+
+
+class SheetDigest:
+    """Order-independent digest of a sheet, built one row at a time."""
+
+    def __init__(self):
+        self.total = 0
+        self.rows = 0
+
+    def add(self, values):
+        self.total = (self.total + row_digest(values)) % _MODULUS
+        self.rows += 1
+
+    @property
+    def hexdigest(self):
+        return f"{self.total:0{2 * DIGEST_BYTES}x}"
+
+
+def stored_digests(version):
+    """``{sheet: hexdigest}`` of the fingerprints taken at LEDGER ``version``."""
+    return dict(
+        SheetFingerprint.objects.filter(ledger_version=version).values_list(
+            "sheet", "digest"
+        )
+    )
+
+
+def store_digests(digests, version):
+    """Record ``{sheet: SheetDigest}`` as describing LEDGER ``version``."""
+    for sheet, digest in digests.items():
+        SheetFingerprint.objects.update_or_create(
+            sheet=sheet,
+            defaults={
+                "digest": digest.hexdigest,
+                "rows": digest.rows,
+                "ledger_version": version,
+            },
+        )
@@ -0,0 +1,253 @@
+"""
+Background Excel imports.
+
+Uploads are spooled to ``IMPORT_SPOOL_DIR`` and imported by a small thread
+pool inside the web worker, so the request returns as soon as the file is on
+disk. Each job's final state lives in an ``ImportJob`` row. Live progress
+goes to a JSON file next to the spooled upload rather than to the database:
+the import holds a write transaction for its whole duration, and on SQLite
+any other write would wait for it. Every worker on the host can read the
+progress file, whichever one accepted the upload.
+
+The worker that accepted an upload holds an exclusive ``flock`` on the
+spooled file until the job ends. If the worker dies (deploy, timeout), the
+lock goes with it, and ``recover_import_jobs`` run at the next worker start
+marks the job failed and removes its files.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connections
+from django.utils import timezone
+
+from .metrics import track
+from .models import Category, ImportJob, Transaction
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not on Windows; recovery is skipped
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SPOOL_DIR = getattr(
+    settings,
+    "IMPORT_SPOOL_DIR",
+    os.path.join(tempfile.gettempdir(), "finance-imports"),
+)
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, "IMPORT_JOB_WORKERS", 1),
+    thread_name_prefix="excel-import",
+)
+# Open, flock()ed spool files of this process's jobs, by job id
+_job_locks = {}
+_job_locks_lock = threading.Lock()
+
+
+def _progress_path(job_id):
+    return os.path.join(SPOOL_DIR, f"job-{job_id}.progress.json")
+
+
+def write_progress(job_id, **progress):
+    """Atomically replace the job's progress file."""
+    path = _progress_path(job_id)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(dict(progress, updated_at=time.time()), f)
+    os.replace(tmp_path, path)
+
+
+def read_progress(job_id):
+    try:
+        with open(_progress_path(job_id)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _try_lock(f):
+    """Take an exclusive flock on the open file ``f`` without waiting."""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def _remove(*paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def spool_upload(uploaded_file):
+    """
+    Copy an uploaded file to the spool directory.
+
+    Returns the open, locked spooled file; its lock marks the job as owned
+    by this process until the file is closed.
+    """
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    suffix = os.path.splitext(uploaded_file.name)[1]
+    spooled = tempfile.NamedTemporaryFile(
+        dir=SPOOL_DIR, prefix="upload-", suffix=suffix, delete=False
+    )
+    # Locked before the ImportJob row exists, so recovery never sees it free
+    _try_lock(spooled)
+    for chunk in uploaded_file.chunks():
+        spooled.write(chunk)
+    spooled.flush()
+    return spooled
+
+
+def enqueue_import(uploaded_file):
+    """
+    Spool ``uploaded_file``, record an ImportJob and schedule it.
+
+    Raises DatabaseError if the job cannot be recorded, e.g. while another
+    import holds the SQLite write lock; the spooled file is removed then.
+    """
+    spooled = spool_upload(uploaded_file)
+    try:
+        job = ImportJob.objects.create(
+            file_name=uploaded_file.name, file_path=spooled.name
+        )
+    except DatabaseError:
+        spooled.close()
+        _remove(spooled.name)
+        raise
+    with _job_locks_lock:
+        _job_locks[job.pk] = spooled
+    write_progress(job.pk, phase="queued", rows_processed=0)
+    _executor.submit(run_import_job, job.pk)
+    return job
+
+
+def recover_import_jobs():
+    """
+    Fail the unfinished jobs whose worker on this host is gone.
+
+    A queued or running job whose spooled file exists here but is not locked
+    lost its worker: it is marked failed and its files removed. Jobs spooled
+    on other hosts, or owned by live workers, are left alone. Returns the
+    number of jobs failed.
+    """
+    if fcntl is None:
+        return 0
+    failed = 0
+    jobs = ImportJob.objects.filter(status__in=(ImportJob.QUEUED, ImportJob.RUNNING))
+    for job in jobs:
+        try:
+            spooled = open(job.file_path, "rb")
+        except OSError:
+            continue
+        with spooled:
+            if not _try_lock(spooled):
+                continue
+            job.status = ImportJob.FAILED
+            job.error = {
+                "msg": "The import was interrupted by a worker restart; "
+                "upload the file again"
+            }
+            job.finished_at = timezone.now()
+            job.save(update_fields=["status", "error", "finished_at"])
+            _remove(job.file_path, _progress_path(job.pk))
+            failed += 1
+    return failed
+
+
+def start_import_recovery():
+    """``recover_import_jobs`` at worker start, logging instead of raising."""
+    try:
+        failed = recover_import_jobs()
+    except DatabaseError:
+        logger.exception("Could not recover interrupted import jobs")
+        return
+    finally:
+        close_old_connections()
+    if failed:
+        logger.warning("Marked %d interrupted import job(s) as failed", failed)
+
+
+def run_import_job(job_id):
+    # Imported here: Export imports this module for its views
+    from .Export import ImportValidationError, import_workbook
+
+    close_old_connections()
+    job = ImportJob.objects.get(pk=job_id)
+    job.status = ImportJob.RUNNING
+    job.started_at = timezone.now()
+    job.save(update_fields=["status", "started_at"])
+
+    rows_by_sheet = {}
+
+    def progress(model_name, rows_read):
+        rows_by_sheet[model_name] = rows_read
+        write_progress(
+            job_id,
+            phase=f"importing {model_name}",
+            rows_processed=sum(rows_by_sheet.values()),
+        )
+
+    try:
+        write_progress(job_id, phase="validating headers", rows_processed=0)
+        # Recorded in /metrics like a request, under view="excel_import_job"
+        with track("excel_import_job"):
+            job.results = import_workbook(
+                job.file_path,
+                {"Category": Category, "Transaction": Transaction},
+                progress=progress,
+            )
+        job.status = ImportJob.DONE
+    except ImportValidationError as err:
+        job.status = ImportJob.FAILED
+        job.error = {"msg": str(err), "report": err.report.as_dict()}
+    except Exception as err:
+        job.status = ImportJob.FAILED
+        job.error = {"msg": str(err)}
+    finally:
+        job.rows_processed = sum(rows_by_sheet.values())
+        job.finished_at = timezone.now()
+        job.save()
+        _remove(job.file_path, _progress_path(job_id))
+        with _job_locks_lock:
+            spooled = _job_locks.pop(job_id, None)
+        if spooled is not None:
+            spooled.close()
+        connections.close_all()
+
+
+def job_status(job):
+    """JSON-ready status of ``job``, merged with its live progress if running."""
+    data = {
+        "job_id": job.pk,
+        "status": job.status,
+        "phase": job.status,
+        "rows_processed": job.rows_processed,
+        "elapsed_seconds": None,
+        "rows_per_second": None,
+        "results": job.results,
+        "error": job.error,
+    }
+    if job.status in (ImportJob.QUEUED, ImportJob.RUNNING):
+        progress = read_progress(job.pk)
+        data["phase"] = progress.get("phase", job.status)
+        data["rows_processed"] = progress.get("rows_processed", 0)
+
+    if job.started_at:
+        elapsed = ((job.finished_at or timezone.now()) - job.started_at).total_seconds()
+        data["elapsed_seconds"] = round(elapsed, 3)
+        if elapsed > 0:
+            data["rows_per_second"] = round(data["rows_processed"] / elapsed, 1)
+    return data
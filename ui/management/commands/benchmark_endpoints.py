@@ -0,0 +1,280 @@
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+
+from ui.bench import QueryCounter, benchmark_database, generate_ledger, percentiles
+from ui.Export import XLSX_CONTENT_TYPE
+from ui.models import ImportJob, Transaction
+from ui.views import encode_cursor
+
+
+def _consume(response):
+    """Read the whole body, so streamed responses are timed to the end."""
+    if response.streaming:
+        return b"".join(response)
+    return response.content
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Time every ui endpoint against a synthetic ledger in a test database "
+        "and print latency percentiles, query counts and peak RSS as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--categories", type=int, default=10)
+        parser.add_argument("--subcategories", type=int, default=10)
+        parser.add_argument("--transactions", type=int, default=100_000)
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--repeat-heavy",
+            type=int,
+            default=3,
+            help="Repeats for full-table exports and the import round trip",
+        )
+        parser.add_argument("--output", help="Also write the report to this file")
+        parser.add_argument(
+            "--compare", help="Earlier report to compare p50/p99 against"
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            try:
+                with open(options["compare"]) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as err:
+                raise CommandError(f"Cannot read {options['compare']}: {err}")
+
+        scale = {
+            key: options[key]
+            for key in ("categories", "subcategories", "transactions", "days", "seed")
+        }
+        report = {
+            "commit": _git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "scale": scale,
+            "repeat": options["repeat"],
+            "endpoints": {},
+        }
+
+        # Streaming async exports warn when the test client consumes them
+        # synchronously; that is expected here
+        with warnings.catch_warnings(), override_settings(
+            ALLOWED_HOSTS=["testserver"]
+        ), benchmark_database():
+            warnings.simplefilter("ignore")
+            report["vendor"] = connection.vendor
+            self.stderr.write(f"Generating {scale['transactions']} transactions...")
+            generate_ledger(**scale)
+            report["rss_after_setup_mb"] = _peak_rss_mb()
+
+            client = Client()
+            queries = QueryCounter()
+            queries.install()
+            try:
+                for name, request, heavy in self._endpoints(client):
+                    self.stderr.write(f"{name}...")
+                    repeat = options["repeat_heavy"] if heavy else options["repeat"]
+                    report["endpoints"][name] = self._measure(request, repeat, queries)
+            finally:
+                queries.uninstall()
+            report["peak_rss_mb"] = _peak_rss_mb()
+
+        if baseline:
+            report["compare"] = self._compare(report, baseline)
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output)
+        self.stdout.write(output)
+
+    def _endpoints(self, client):
+        """``(name, request, heavy)``; ``request()`` performs one request."""
+        per_page = 20
+        count = Transaction.objects.count()
+        last_page = max(1, -(-count // per_page))
+        deep_row = (
+            Transaction.objects.order_by("datetime", "id")[per_page : per_page + 1]
+            .only("id", "datetime")
+            .first()
+        )
+        deep_cursor = (
+            encode_cursor(deep_row.id, deep_row.datetime, "next") if deep_row else ""
+        )
+        category, subcategory = (
+            Transaction.objects.values_list(
+                "category_ref__category", "category_ref__subcategory"
+            )
+            .order_by("pk")
+            .first()
+        )
+        row = {"category": category, "subcategory": subcategory, "amount": "12.34"}
+
+        def get(path, **params):
+            return lambda: client.get(path, params)
+
+        def post_json(path, data):
+            return lambda: client.post(
+                path, json.dumps(data), content_type="application/json"
+            )
+
+        def import_round_trip():
+            workbook = _consume(client.get("/api/excel-export/"))
+            response = client.post(
+                "/api/excel-import/",
+                {
+                    "file": SimpleUploadedFile(
+                        "ledger.xlsx", workbook, content_type=XLSX_CONTENT_TYPE
+                    )
+                },
+            )
+            if response.status_code != 202:
+                return response
+            status_url = response.json()["status_url"]
+            while True:
+                status = client.get(status_url)
+                if status.json()["status"] in (ImportJob.DONE, ImportJob.FAILED):
+                    break
+                time.sleep(0.02)
+            if status.json()["status"] == ImportJob.FAILED:
+                raise CommandError(f"Import failed: {status.json()['error']}")
+            return status
+
+        return [
+            ("home", get("/"), False),
+            (
+                "transactions_page_1",
+                get("/api/transactions/", per_page=per_page),
+                False,
+            ),
+            (
+                "transactions_deep_page",
+                get("/api/transactions/", page=last_page, per_page=per_page),
+                False,
+            ),
+            (
+                "transactions_cursor_first",
+                get("/api/transactions/", cursor="", per_page=per_page),
+                False,
+            ),
+            (
+                "transactions_cursor_deep",
+                get("/api/transactions/", cursor=deep_cursor, per_page=per_page),
+                False,
+            ),
+            ("category_summary", get("/api/category-summary/"), False),
+            ("rollup_summary_month", get("/api/summary/", granularity="month"), False),
+            ("rollup_summary_day", get("/api/summary/", granularity="day"), False),
+            ("analytics_monthly", get("/api/analytics/monthly/"), False),
+            (
+                "analytics_subcategories",
+                get("/api/analytics/subcategories/", category=category),
+                False,
+            ),
+            (
+                "analytics_moving_average",
+                get("/api/analytics/moving-average/", window=30),
+                False,
+            ),
+            ("categories", get("/api/category"), False),
+            ("typst_json", get("/api/typst-json/"), False),
+            ("cache_stats", get("/api/cache-stats/"), False),
+            ("transaction_add", post_json("/api/transaction-add", row), False),
+            (
+                "transaction_batch_100",
+                post_json("/api/transactions/batch", [row] * 100),
+                False,
+            ),
+            ("export_csv", get("/api/export/transaction/", format="csv"), True),
+            ("export_arrow", get("/api/export/transaction/", format="arrow"), True),
+            ("export_parquet", get("/api/export/transaction/", format="parquet"), True),
+            ("excel_export", get("/api/excel-export/"), True),
+            ("excel_import_round_trip", import_round_trip, True),
+        ]
+
+    def _measure(self, request, repeat, queries):
+        rss_before = _peak_rss_mb()
+        statuses = set()
+        # Queries of one (cold) request, including background import jobs
+        queries_before = queries.count
+        response = request()
+        _consume(response)
+        query_count = queries.count - queries_before
+        statuses.add(response.status_code)
+
+        latencies = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = request()
+            _consume(response)
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses.add(response.status_code)
+
+        return {
+            "status": sorted(statuses),
+            "queries": query_count,
+            "latency_ms": percentiles(latencies),
+            "peak_rss_mb": _peak_rss_mb(),
+            "rss_growth_mb": round(_peak_rss_mb() - rss_before, 1),
+        }
+
+    def _compare(self, report, baseline):
+        """Relative p50/p99 change per endpoint against ``baseline``."""
+        changes = {"baseline_commit": baseline.get("commit"), "endpoints": {}}
+        for name, result in report["endpoints"].items():
+            before = baseline.get("endpoints", {}).get(name)
+            if not before:
+                continue
+            changes["endpoints"][name] = {
+                f"{key}_change_pct": (
+                    round(
+                        (result["latency_ms"][key] / before["latency_ms"][key] - 1)
+                        * 100,
+                        1,
+                    )
+                    if before["latency_ms"].get(key)
+                    else None
+                )
+                for key in ("p50", "p99")
+            }
+            changes["endpoints"][name]["queries_change"] = (
+                result["queries"] - before["queries"]
+            )
+        return changes
@@ -0,0 +1,141 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q, Sum
+
+from ui.bench import benchmark_database, generate_ledger, percentiles, time_call
+from ui.models import Transaction
+
+# Indexes added for the hot query paths; the PK is never dropped
+BENCHMARKED_INDEXES = [
+    "ui_txn_datetime_id_idx",
+    "ui_txn_catref_dt_idx",
+    "ui_txn_catref_amt_idx",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare query plans and latencies of the Transaction hot paths with "
+        "and without their indexes, on a synthetic ledger in a test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--transactions", type=int, default=1_000_000)
+        parser.add_argument("--categories", type=int, default=10)
+        parser.add_argument("--subcategories", type=int, default=10)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--json", action="store_true", help="Print the report as JSON"
+        )
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            self.stderr.write(
+                f"Generating {options['transactions']} transactions "
+                f"on {connection.vendor}..."
+            )
+            generate_ledger(
+                categories=options["categories"],
+                subcategories=options["subcategories"],
+                transactions=options["transactions"],
+                seed=options["seed"],
+            )
+
+            indexes = [
+                index
+                for index in Transaction._meta.indexes
+                if index.name in BENCHMARKED_INDEXES
+            ]
+            with connection.schema_editor() as editor:
+                for index in indexes:
+                    editor.remove_index(Transaction, index)
+            self._analyze()
+            before = self._run_queries(options["repeat"])
+
+            with connection.schema_editor() as editor:
+                for index in indexes:
+                    editor.add_index(Transaction, index)
+            self._analyze()
+            after = self._run_queries(options["repeat"])
+
+        report = {
+            "vendor": connection.vendor,
+            "transactions": options["transactions"],
+            "queries": {
+                name: {"before": before[name], "after": after[name]} for name in before
+            },
+        }
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        for name, runs in report["queries"].items():
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for label in ("before", "after"):
+                run = runs[label]
+                self.stdout.write(
+                    f"  {label:<6} p50={run['latency_ms']['p50']}ms "
+                    f"p95={run['latency_ms']['p95']}ms"
+                )
+                for line in run["plan"].splitlines():
+                    self.stdout.write(f"           {line}")
+
+    def _analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def _run_queries(self, repeat):
+        newest = Transaction.objects.order_by("-datetime", "-id").first()
+        middle = Transaction.objects.order_by("-datetime", "-id")[
+            Transaction.objects.count() // 2
+        ]
+        pair = Q(category_ref_id=newest.category_ref_id)
+
+        def delete_pair():
+            with transaction.atomic():
+                Transaction.objects.filter(pair).delete()
+                transaction.set_rollback(True)
+
+        queries = {
+            "first page": (
+                Transaction.objects.order_by("-datetime", "-id")[:50],
+                None,
+            ),
+            "deep keyset page": (
+                Transaction.objects.filter(
+                    Q(datetime__lt=middle.datetime)
+                    | Q(datetime=middle.datetime, id__lt=middle.id)
+                ).order_by("-datetime", "-id")[:50],
+                None,
+            ),
+            "category listing": (
+                Transaction.objects.filter(pair).order_by("-datetime")[:50],
+                None,
+            ),
+            "category sum": (
+                Transaction.objects.filter(pair)
+                .order_by()
+                .values("category_ref")
+                .annotate(total=Sum("amount")),
+                None,
+            ),
+            "delete by category": (
+                Transaction.objects.filter(pair).order_by(),
+                lambda qs: delete_pair(),
+            ),
+        }
+
+        results = {}
+        for name, (queryset, run) in queries.items():
+            run = run or list
+            results[name] = {
+                "plan": queryset.explain(),
+                # .all() clones the queryset so no run reuses a cached result
+                "latency_ms": percentiles(
+                    time_call(lambda: run(queryset.all()), repeat)
+                ),
+            }
+        return results
@@ -0,0 +1,130 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse
+
+from ui.bench import benchmark_database, generate_ledger, percentiles
+from ui.models import Category, Transaction
+from ui.responses import dumps, json_response, orjson, records
+from ui.views import TRANSACTION_FIELDS, TRANSACTION_LOOKUPS
+
+
+def _legacy_transactions(per_page):
+    # transaction_api before the shared JSON layer: model instances, a
+    # converted dict per row and an indented stdlib encoding
+    rows = Transaction.objects.select_related("category_ref")[:per_page]
+    data = {
+        "transactions": [
+            {
+                "id": t.id,
+                "datetime": t.datetime.isoformat(),
+                "category": t.category,
+                "subcategory": t.subcategory,
+                "amount": str(t.amount),
+            }
+            for t in rows
+        ]
+    }
+    return JsonResponse(data, safe=False, json_dumps_params={"indent": 2}).content
+
+
+def _transactions(per_page):
+    rows = Transaction.objects.values_list(*TRANSACTION_LOOKUPS)[:per_page]
+    data = {"transactions": records(TRANSACTION_FIELDS, rows)}
+    return json_response(data).content
+
+
+def _legacy_summary():
+    categories_dict = {}
+    for cat in Category.objects.order_by("category", "subcategory"):
+        categories_dict.setdefault(cat.category, {})[cat.subcategory] = float(
+            cat.total_sum
+        )
+    return json.dumps({"categories": categories_dict}).encode()
+
+
+def _summary():
+    categories_dict = {}
+    rows = Category.objects.order_by("category", "subcategory").values_list(
+        "category", "subcategory", "total_sum"
+    )
+    for category, subcategory, total_sum in rows:
+        categories_dict.setdefault(category, {})[subcategory] = total_sum
+    return dumps({"categories": categories_dict})
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the transaction and summary JSON bodies built the old way "
+        "(model instances, stdlib JsonResponse) with the shared JSON layer, "
+        "on a test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--per-page",
+            default="20,1000,10000",
+            help="Comma-separated transaction page sizes",
+        )
+        parser.add_argument("--categories", type=int, default=20)
+        parser.add_argument("--subcategories", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--json", action="store_true", help="Print the report as JSON"
+        )
+
+    def handle(self, *args, **options):
+        sizes = [int(n) for n in options["per_page"].split(",")]
+        report = {"encoder": "orjson" if orjson else "json", "results": []}
+        with benchmark_database():
+            generate_ledger(
+                categories=options["categories"],
+                subcategories=options["subcategories"],
+                transactions=max(sizes),
+            )
+            cases = [
+                (
+                    f"transactions_{n}",
+                    lambda n=n: _legacy_transactions(n),
+                    lambda n=n: _transactions(n),
+                )
+                for n in sizes
+            ]
+            cases.append(("category_summary", _legacy_summary, _summary))
+            for name, legacy, current in cases:
+                self.stderr.write(f"{name}...")
+                report["results"].append(
+                    {
+                        "case": name,
+                        "legacy": self._measure(legacy, options["repeat"]),
+                        "current": self._measure(current, options["repeat"]),
+                    }
+                )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"Encoder: {report['encoder']}")
+        self.stdout.write(
+            f"{'case':<20} {'legacy ms':>10} {'ms':>8} {'speedup':>8} "
+            f"{'legacy KB':>10} {'KB':>8}"
+        )
+        for result in report["results"]:
+            legacy, current = result["legacy"], result["current"]
+            self.stdout.write(
+                f"{result['case']:<20} {legacy['latency_ms']['p50']:>10} "
+                f"{current['latency_ms']['p50']:>8} "
+                f"{legacy['latency_ms']['p50'] / current['latency_ms']['p50']:>7.1f}x "
+                f"{legacy['bytes'] / 1024:>10.1f} {current['bytes'] / 1024:>8.1f}"
+            )
+
+    def _measure(self, build, repeat):
+        body = build()
+        latencies = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            build()
+            latencies.append((time.perf_counter() - start) * 1000)
+        return {"bytes": len(body), "latency_ms": percentiles(latencies)}
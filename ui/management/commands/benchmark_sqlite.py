@@ -0,0 +1,146 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from openpyxl import Workbook
+
+from ui.bench import benchmark_database, generate_ledger, percentiles
+from ui.Export import import_workbook, write_model_sheet
+from ui.models import Category, Transaction
+from ui.views import transaction_api
+
+
+class Command(BaseCommand):
+    help = (
+        "Run /api/transactions/ readers during a large Excel import on SQLite, "
+        "once per SQLITE_PROFILES entry, and report how the reads fared."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=100_000,
+            help="Rows inserted by the import, and transactions read meanwhile",
+        )
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument(
+            "--profile",
+            action="append",
+            help="SQLITE_PROFILES entry to run; repeatable (default: all)",
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Print the report as JSON"
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("This benchmark needs a SQLite database")
+
+        report = {"rows": options["rows"], "results": []}
+        for profile in options["profile"] or list(settings.SQLITE_PROFILES):
+            pragmas = settings.SQLITE_PROFILES[profile]
+            # SQLite's defaults have to be restored explicitly: WAL persists
+            pragmas = {"journal_mode": "DELETE", **pragmas}
+            with override_settings(SQLITE_PRAGMAS=pragmas), benchmark_database():
+                connection.close()
+                self.stderr.write(f"{profile}: preparing workbook...")
+                path = self._prepare(options["rows"])
+                try:
+                    self.stderr.write(f"{profile}: importing with readers...")
+                    result = self._run(path, options["readers"])
+                finally:
+                    os.remove(path)
+                result["profile"] = profile
+                report["results"].append(result)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'profile':<11} {'import s':>8} {'reads':>7} {'reads/s':>8} "
+            f"{'p50 ms':>8} {'p99 ms':>9} {'max ms':>9} {'errors':>6}"
+        )
+        for result in report["results"]:
+            latency = result["latency_ms"]
+            self.stdout.write(
+                f"{result['profile']:<11} {result['import_seconds']:>8} "
+                f"{result['reads']:>7} {result['reads_per_second']:>8} "
+                f"{latency.get('p50', '-'):>8} {latency.get('p99', '-'):>9} "
+                f"{latency.get('max', '-'):>9} {result['errors']:>6}"
+            )
+
+    def _prepare(self, rows):
+        """
+        Create a ledger of ``rows`` transactions and write it to a workbook
+        whose Category sheet also holds ``rows`` new categories, so that the
+        import inserts ``rows`` rows in one transaction.
+        """
+        generate_ledger(transactions=rows)
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Category")
+        sheet.append(["category", "subcategory", "total_sum"])
+        for row in Category.objects.values_list("category", "subcategory", "total_sum"):
+            sheet.append(list(row))
+        for i in range(rows):
+            sheet.append([f"Imported {i // 100}", f"Item {i % 100}", 0])
+        write_model_sheet(workbook, Transaction)
+
+        fd, path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        workbook.save(path)
+        return path
+
+    def _run(self, path, readers):
+        factory = RequestFactory()
+        view = async_to_sync(transaction_api)
+        stop = threading.Event()
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+
+        def reader():
+            own_latencies, own_errors = [], []
+            try:
+                while not stop.is_set():
+                    request = factory.get("/api/transactions/", {"per_page": 20})
+                    start = time.perf_counter()
+                    try:
+                        view(request)
+                    except Exception as err:
+                        own_errors.append(str(err))
+                    own_latencies.append((time.perf_counter() - start) * 1000)
+            finally:
+                connection.close()
+            with lock:
+                latencies.extend(own_latencies)
+                errors.extend(own_errors)
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        started = time.perf_counter()
+        try:
+            import_workbook(path, {"Category": Category, "Transaction": Transaction})
+        finally:
+            elapsed = time.perf_counter() - started
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        return {
+            "import_seconds": round(elapsed, 2),
+            "reads": len(latencies),
+            "reads_per_second": round(len(latencies) / elapsed, 1),
+            "latency_ms": percentiles(latencies) if latencies else {},
+            "errors": len(errors),
+            "first_error": errors[0] if errors else None,
+        }
@@ -0,0 +1,146 @@
+import json
+import threading
+import time
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory, override_settings
+
+from ui import writebuffer
+from ui.bench import benchmark_database, generate_ledger, percentiles
+from ui.models import Category, Transaction
+from ui.views import transaction_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure /api/transaction-add throughput with and without the group "
+        "commit write buffer at several numbers of concurrent writers, on a "
+        "test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--writers",
+            default="1,8,64",
+            help="Comma-separated numbers of concurrent writer threads",
+        )
+        parser.add_argument(
+            "--transactions",
+            type=int,
+            default=2000,
+            help="Transactions added per run, split across the writers",
+        )
+        parser.add_argument("--max-latency-ms", type=float, default=2)
+        parser.add_argument("--max-batch", type=int, default=500)
+        parser.add_argument(
+            "--json", action="store_true", help="Print the report as JSON"
+        )
+
+    def handle(self, *args, **options):
+        writer_counts = [int(n) for n in options["writers"].split(",")]
+        report = {"vendor": None, "results": []}
+        with benchmark_database():
+            report["vendor"] = connection.vendor
+            generate_ledger(categories=5, subcategories=5, transactions=0)
+            pairs = list(Category.objects.values_list("category", "subcategory"))
+
+            for buffered in (False, True):
+                writebuffer._write_buffer = None
+                with override_settings(
+                    WRITE_BUFFER_ENABLED=buffered,
+                    WRITE_BUFFER_MAX_LATENCY_MS=options["max_latency_ms"],
+                    WRITE_BUFFER_MAX_BATCH=options["max_batch"],
+                ):
+                    for writers in writer_counts:
+                        self.stderr.write(
+                            f"{'buffered' if buffered else 'direct'}: "
+                            f"{writers} writers..."
+                        )
+                        result = self._run(writers, options["transactions"], pairs)
+                        result["mode"] = "buffered" if buffered else "direct"
+                        report["results"].append(result)
+
+            # Every accepted row must have reached its category total
+            report["consistent"] = sum(
+                Category.objects.values_list("total_sum", flat=True)
+            ) == sum(Transaction.objects.values_list("amount", flat=True))
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'mode':<9} {'writers':>7} {'rows/s':>9} {'p50 ms':>8} "
+            f"{'p99 ms':>8} {'errors':>6} {'avg batch':>9}"
+        )
+        for result in report["results"]:
+            latency = result["latency_ms"]
+            self.stdout.write(
+                f"{result['mode']:<9} {result['writers']:>7} "
+                f"{result['rows_per_second']:>9} {latency.get('p50', '-'):>8} "
+                f"{latency.get('p99', '-'):>8} {result['errors']:>6} "
+                f"{result['avg_batch'] or '-':>9}"
+            )
+        self.stdout.write(f"Totals consistent: {report['consistent']}")
+
+    def _run(self, writers, transactions, pairs):
+        factory = RequestFactory()
+        view = async_to_sync(transaction_add)
+        per_writer = max(1, transactions // writers)
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+        buffer = writebuffer.get_write_buffer()
+        batches_before = buffer.batches if buffer else 0
+        rows_before = buffer.rows if buffer else 0
+
+        def writer(n):
+            own_latencies, own_errors = [], []
+            try:
+                for i in range(per_writer):
+                    category, subcategory = pairs[(n + i) % len(pairs)]
+                    request = factory.post(
+                        "/api/transaction-add",
+                        json.dumps(
+                            {
+                                "category": category,
+                                "subcategory": subcategory,
+                                "amount": "1.25",
+                            }
+                        ),
+                        content_type="application/json",
+                    )
+                    start = time.perf_counter()
+                    response = view(request)
+                    own_latencies.append((time.perf_counter() - start) * 1000)
+                    if response.status_code != 201:
+                        own_errors.append(json.loads(response.content).get("error"))
+            finally:
+                connection.close()
+            with lock:
+                latencies.extend(own_latencies)
+                errors.extend(own_errors)
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        accepted = len(latencies) - len(errors)
+        batches = (buffer.batches - batches_before) if buffer else 0
+        return {
+            "writers": writers,
+            "requests": len(latencies),
+            "rows_per_second": round(accepted / elapsed, 1),
+            "latency_ms": percentiles(latencies),
+            "errors": len(errors),
+            "first_error": errors[0] if errors else None,
+            "avg_batch": (
+                round((buffer.rows - rows_before) / batches, 1) if batches else None
+            ),
+        }
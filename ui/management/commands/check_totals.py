@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from ui.totals import check_category_totals
+
+
+class Command(BaseCommand):
+    help = (
+        "Verify Category.total_sum against the transactions added since the "
+        "last check, and repair the totals that drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Check every category, not only those with new transactions",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Report drift without repairing it"
+        )
+
+    def handle(self, *args, **options):
+        result = check_category_totals(
+            full=options["full"], repair=not options["dry_run"]
+        )
+        for row in result["drifted"]:
+            self.stdout.write(
+                f"{row['category']} / {row['subcategory']}: "
+                f"{row['stored']} -> {row['actual']}"
+            )
+        self.stdout.write(
+            f"{'Full' if result['full'] else 'Incremental'} check of "
+            f"{result['checked']} categories: {len(result['drifted'])} "
+            f"{'drifted' if options['dry_run'] else 'repaired'}"
+        )
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from ui.bench import generate_ledger
+from ui.caching import LEDGER_REWRITES, bump_version
+from ui.models import Category, Transaction, TransactionRollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the configured database with a reproducible synthetic ledger: "
+        "categories x subcategories Category rows and N transactions spread "
+        "over a date span."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--categories", type=int, default=10)
+        parser.add_argument("--subcategories", type=int, default=10)
+        parser.add_argument("--transactions", type=int, default=100_000)
+        parser.add_argument(
+            "--days", type=int, default=365, help="Date span, ending now"
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete every existing category and transaction first",
+        )
+
+    def handle(self, *args, **options):
+        if Category.objects.exists():
+            if not options["clear"]:
+                raise CommandError(
+                    "The database already has categories; pass --clear to "
+                    "replace them"
+                )
+            # Raw deletes: the ORM would send a signal per transaction
+            with transaction.atomic(), connection.cursor() as cursor:
+                for model in (TransactionRollup, Transaction, Category):
+                    cursor.execute(f"DELETE FROM {model._meta.db_table}")
+                bump_version(LEDGER_REWRITES)
+
+        with transaction.atomic():
+            generate_ledger(
+                categories=options["categories"],
+                subcategories=options["subcategories"],
+                transactions=options["transactions"],
+                days=options["days"],
+                seed=options["seed"],
+            )
+        self.stdout.write(
+            f"Created {Category.objects.count()} categories and "
+            f"{Transaction.objects.count()} transactions"
+        )
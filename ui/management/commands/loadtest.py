@@ -0,0 +1,121 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection, HTTPSConnection
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ui.bench import percentiles
+
+# The async read endpoints
+DEFAULT_ENDPOINTS = [
+    "/api/transactions/?page=1&per_page=20",
+    "/api/transactions/?cursor=&per_page=20",
+    "/api/category-summary/",
+    "/api/category",
+    "/api/typst-json/",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test running servers and report req/s and latency percentiles "
+        "per endpoint. Pass several --target label=URL to compare them, e.g. "
+        "the same worker count under WSGI and under ASGI."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target",
+            action="append",
+            required=True,
+            help="label=base URL of a running server; repeat to compare",
+        )
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            help="Path to request; repeatable (default: the read endpoints)",
+        )
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument(
+            "--json", action="store_true", help="Print the report as JSON"
+        )
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options["target"]:
+            label, sep, url = target.partition("=")
+            if not sep or not url:
+                raise CommandError(f"--target must be label=URL, got {target!r}")
+            targets.append((label, url.rstrip("/")))
+
+        report = {
+            "workers": os.environ.get("WEB_CONCURRENCY"),
+            "concurrency": options["concurrency"],
+            "requests": options["requests"],
+            "results": [],
+        }
+        for label, base_url in targets:
+            for endpoint in options["endpoint"] or DEFAULT_ENDPOINTS:
+                self.stderr.write(f"{label}: {endpoint}...")
+                result = self._run(
+                    base_url + endpoint, options["requests"], options["concurrency"]
+                )
+                report["results"].append(dict(result, target=label, endpoint=endpoint))
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'target':<10} {'endpoint':<42} {'req/s':>9} {'p50 ms':>8} "
+            f"{'p99 ms':>8} {'errors':>6}"
+        )
+        for result in report["results"]:
+            latency = result["latency_ms"]
+            self.stdout.write(
+                f"{result['target']:<10} {result['endpoint']:<42} "
+                f"{result['requests_per_second']:>9} {latency.get('p50', '-'):>8} "
+                f"{latency.get('p99', '-'):>8} {result['errors']:>6}"
+            )
+
+    def _run(self, url, requests, concurrency):
+        parts = urlsplit(url)
+        connection_class = (
+            HTTPSConnection if parts.scheme == "https" else HTTPConnection
+        )
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        # One keep-alive connection per client thread
+        local = threading.local()
+        errors = []
+
+        def fetch(_):
+            if getattr(local, "conn", None) is None:
+                local.conn = connection_class(parts.netloc, timeout=30)
+            start = time.perf_counter()
+            try:
+                local.conn.request("GET", path)
+                response = local.conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    errors.append(response.status)
+            except OSError as err:
+                errors.append(str(err))
+                local.conn.close()
+                local.conn = None
+            return (time.perf_counter() - start) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(fetch, range(requests)))
+        elapsed = time.perf_counter() - started
+
+        return {
+            "requests_per_second": round(requests / elapsed, 1),
+            "latency_ms": percentiles(latencies),
+            "errors": len(errors),
+        }
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from ui.models import TransactionRollup
+from ui.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily and monthly transaction rollups from scratch."
+
+    def handle(self, *args, **options):
+        rebuild_rollups()
+        for granularity, label in TransactionRollup.GRANULARITY_CHOICES:
+            count = TransactionRollup.objects.filter(granularity=granularity).count()
+            self.stdout.write(f"{label}: {count} buckets")
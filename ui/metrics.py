@@ -0,0 +1,290 @@
+"""
+Per-request performance metrics, exported in the Prometheus text format.
+
+``MetricsMiddleware`` opens a RequestMetrics for every request (``track``
+does the same for background work such as import jobs). While it is
+current, the execute wrapper installed on every database connection adds
+each query's count and time to it, and ``phase`` / ``timed_iter`` add named
+sub-phase timings. Phases nest: time spent in an inner phase is not also
+counted for the outer one. When the request finishes its numbers are added
+to the histograms below, which ``render_metrics`` serialises for
+``/metrics``.
+
+The histograms live in process memory, so with several web workers each
+one reports its own share of the traffic.
+"""
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+BYTES_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+
+
+class Histogram:
+    """Cumulative-bucket histogram for one label set."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class Registry:
+    """Named histograms and counters, keyed by their label values."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # name -> (help, buckets, {labels: Histogram})
+        self.histograms = {}
+        # name -> (help, {labels: value})
+        self.counters = {}
+
+    def histogram(self, name, help_text, buckets):
+        self.histograms.setdefault(name, (help_text, buckets, {}))
+
+    def counter(self, name, help_text):
+        self.counters.setdefault(name, (help_text, {}))
+
+    def observe(self, name, labels, value):
+        _, buckets, series = self.histograms[name]
+        with self._lock:
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name, labels, amount=1):
+        series = self.counters[name][1]
+        with self._lock:
+            series[labels] = series.get(labels, 0) + amount
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, (help_text, series) in self.counters.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_labels(labels)} {value}")
+            for name, (help_text, _, series) in self.histograms.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(series.items()):
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        le = labels + (("le", _number(bound)),)
+                        lines.append(f"{name}_bucket{_labels(le)} {count}")
+                    le = labels + (("le", "+Inf"),)
+                    lines.append(f"{name}_bucket{_labels(le)} {histogram.count}")
+                    lines.append(
+                        f"{name}_sum{_labels(labels)} {_number(histogram.sum)}"
+                    )
+                    lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+registry = Registry()
+registry.counter("finance_requests_total", "Requests handled, by view and status.")
+registry.histogram(
+    "finance_request_duration_seconds",
+    "Wall time per request, including streamed bodies.",
+    SECONDS_BUCKETS,
+)
+registry.histogram(
+    "finance_request_db_seconds", "Database time per request.", SECONDS_BUCKETS
+)
+registry.histogram(
+    "finance_request_db_queries", "Database queries per request.", QUERY_BUCKETS
+)
+registry.histogram("finance_response_size_bytes", "Response body size.", BYTES_BUCKETS)
+registry.histogram(
+    "finance_phase_duration_seconds",
+    "Time spent in named phases of a request, excluding nested phases.",
+    SECONDS_BUCKETS,
+)
+
+
+class RequestMetrics:
+    """Measurements of one request or background task."""
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.phases = {}
+        # [name, start, time spent in nested phases] per open phase
+        self._stack = []
+
+    def enter(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def exit(self):
+        name, start, nested = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        self.phases[name] = self.phases.get(name, 0.0) + elapsed - nested
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def finish(self, status=None, size=None):
+        """Record this request in the registry and log it if it was slow."""
+        elapsed = time.perf_counter() - self.started
+        labels = (("view", self.name),)
+        registry.inc("finance_requests_total", labels + (("status", str(status)),))
+        registry.observe("finance_request_duration_seconds", labels, elapsed)
+        registry.observe("finance_request_db_seconds", labels, self.db_seconds)
+        registry.observe("finance_request_db_queries", labels, self.queries)
+        if size is not None:
+            registry.observe("finance_response_size_bytes", labels, size)
+        for phase_name, seconds in self.phases.items():
+            registry.observe(
+                "finance_phase_duration_seconds",
+                labels + (("phase", phase_name),),
+                seconds,
+            )
+
+        threshold = getattr(settings, "METRICS_SLOW_REQUEST_SECONDS", None)
+        if threshold is not None and elapsed >= threshold:
+            logger.warning(
+                "Slow request %s: %s",
+                self.name,
+                json.dumps(
+                    {
+                        "status": status,
+                        "seconds": round(elapsed, 3),
+                        "db_seconds": round(self.db_seconds, 3),
+                        "queries": self.queries,
+                        "bytes": size,
+                        "phases": {
+                            name: round(seconds, 3)
+                            for name, seconds in self.phases.items()
+                        },
+                    }
+                ),
+            )
+
+
+_current = ContextVar("request_metrics", default=None)
+
+
+def current():
+    return _current.get()
+
+
+def activate(metrics):
+    return _current.set(metrics)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+@contextmanager
+def track(name):
+    """Collect metrics for a block of work outside any request."""
+    metrics = RequestMetrics(name)
+    token = activate(metrics)
+    status = "ok"
+    try:
+        yield metrics
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        deactivate(token)
+        metrics.finish(status=status)
+
+
+@contextmanager
+def phase(name):
+    """Time the enclosed block as phase ``name`` of the current request."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    metrics.enter(name)
+    try:
+        yield
+    finally:
+        metrics.exit()
+
+
+def timed_iter(name, iterable):
+    """Yield from ``iterable``, timing each step of it as phase ``name``."""
+    metrics = _current.get()
+    if metrics is None:
+        yield from iterable
+        return
+    iterator = iter(iterable)
+    while True:
+        metrics.enter(name)
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            metrics.exit()
+        yield item
+
+
+def db_wrapper(execute, sql, params, many, context):
+    """Execute wrapper adding each query to the current RequestMetrics."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_seconds += time.perf_counter() - start
+
+
+def render_metrics():
+    # Shared caches are reported as counters alongside the request metrics
+    from .caching import response_cache
+
+    stats = response_cache.stats()
+    lines = [
+        "# HELP finance_response_cache_hits_total Response cache hits.",
+        "# TYPE finance_response_cache_hits_total counter",
+        f"finance_response_cache_hits_total {stats['hits']}",
+        "# HELP finance_response_cache_misses_total Response cache misses.",
+        "# TYPE finance_response_cache_misses_total counter",
+        f"finance_response_cache_misses_total {stats['misses']}",
+        "# HELP finance_response_cache_entries Bodies in the response cache.",
+        "# TYPE finance_response_cache_entries gauge",
+        f"finance_response_cache_entries {stats['entries']}",
+    ]
+    return registry.render() + "\n".join(lines) + "\n"
@@ -0,0 +1,133 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import metrics
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that can also run in an async middleware chain.
+
+    WhiteNoise itself is sync-only, so under ASGI Django would hop every
+    request through a thread to call it, and again to get back to the async
+    views. Here non-static requests are passed straight through on the event
+    loop; only static file hits are served from a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, **kwargs):
+        super().__init__(get_response, **kwargs)
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class MetricsMiddleware:
+    """
+    Record wall time, database work, response size and phases per view.
+
+    Streamed bodies are measured when the last chunk has been sent, except
+    file responses, whose size is known up front.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        request_metrics = metrics.RequestMetrics("unresolved")
+        token = metrics.activate(request_metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.deactivate(token)
+        return self._finish(request, response, request_metrics)
+
+    async def __acall__(self, request):
+        request_metrics = metrics.RequestMetrics("unresolved")
+        token = metrics.activate(request_metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.deactivate(token)
+        return self._finish(request, response, request_metrics)
+
+    def _finish(self, request, response, request_metrics):
+        match = request.resolver_match
+        if match:
+            request_metrics.name = match.view_name
+        if not response.streaming:
+            request_metrics.finish(response.status_code, len(response.content))
+        elif response.has_header("Content-Length"):
+            request_metrics.finish(
+                response.status_code, int(response["Content-Length"])
+            )
+        elif response.is_async:
+            response.streaming_content = self._acount(
+                response.streaming_content, response.status_code, request_metrics
+            )
+        else:
+            response.streaming_content = self._count(
+                response.streaming_content, response.status_code, request_metrics
+            )
+        return response
+
+    @staticmethod
+    def _count(chunks, status, request_metrics):
+        # Queries run while producing the body still belong to the request
+        size = 0
+        chunks = iter(chunks)
+        try:
+            while True:
+                token = metrics.activate(request_metrics)
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    return
+                finally:
+                    metrics.deactivate(token)
+                size += len(chunk)
+                yield chunk
+        finally:
+            request_metrics.finish(status, size)
+
+    @staticmethod
+    async def _acount(chunks, status, request_metrics):
+        size = 0
+        chunks = aiter(chunks)
+        try:
+            while True:
+                token = metrics.activate(request_metrics)
+                try:
+                    chunk = await anext(chunks)
+                except StopAsyncIteration:
+                    return
+                finally:
+                    metrics.deactivate(token)
+                size += len(chunk)
+                yield chunk
+        finally:
+            request_metrics.finish(status, size)
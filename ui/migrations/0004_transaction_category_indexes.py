@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ui", "0003_transaction_datetime_id_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["category", "subcategory", "datetime"],
+                name="ui_txn_cat_subcat_dt_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["category", "subcategory", "amount"],
+                name="ui_txn_cat_subcat_amt_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,118 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+
+
+def link_categories(apps, schema_editor):
+    Category = apps.get_model("ui", "Category")
+    Transaction = apps.get_model("ui", "Transaction")
+
+    # Transactions whose pair has no Category row get one, so no row is
+    # lost, with the total of those transactions
+    known = set(Category.objects.values_list("category", "subcategory"))
+    orphans = (
+        Transaction.objects.order_by()
+        .values("category", "subcategory")
+        .annotate(total=Sum("amount"))
+        .values_list("category", "subcategory", "total")
+    )
+    Category.objects.bulk_create(
+        [
+            Category(category=category, subcategory=subcategory, total_sum=total)
+            for category, subcategory, total in orphans
+            if (category, subcategory) not in known
+        ]
+    )
+
+    Transaction.objects.update(
+        category_ref=Subquery(
+            Category.objects.filter(
+                category=OuterRef("category"), subcategory=OuterRef("subcategory")
+            ).values("pk")[:1]
+        )
+    )
+
+
+def unlink_categories(apps, schema_editor):
+    Category = apps.get_model("ui", "Category")
+    Transaction = apps.get_model("ui", "Transaction")
+
+    pairs = Category.objects.filter(pk=OuterRef("category_ref"))
+    Transaction.objects.update(
+        category=Subquery(pairs.values("category")[:1]),
+        subcategory=Subquery(pairs.values("subcategory")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ui", "0004_transaction_category_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="category_ref",
+            field=models.ForeignKey(
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="transactions",
+                to="ui.category",
+            ),
+        ),
+        # Nullable while both representations exist, so that the migration
+        # can also be reversed
+        migrations.AlterField(
+            model_name="transaction",
+            name="category",
+            field=models.CharField(max_length=100, null=True),
+        ),
+        migrations.AlterField(
+            model_name="transaction",
+            name="subcategory",
+            field=models.CharField(max_length=100, null=True),
+        ),
+        migrations.RunPython(link_categories, unlink_categories),
+        migrations.AlterField(
+            model_name="transaction",
+            name="category_ref",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="transactions",
+                to="ui.category",
+            ),
+        ),
+        migrations.RemoveIndex(
+            model_name="transaction",
+            name="ui_txn_cat_subcat_dt_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="transaction",
+            name="ui_txn_cat_subcat_amt_idx",
+        ),
+        migrations.RemoveField(
+            model_name="transaction",
+            name="category",
+        ),
+        migrations.RemoveField(
+            model_name="transaction",
+            name="subcategory",
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["category_ref", "datetime"], name="ui_txn_catref_dt_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["category_ref", "amount"], name="ui_txn_catref_amt_idx"
+            ),
+        ),
+    ]
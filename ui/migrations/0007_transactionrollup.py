@@ -0,0 +1,89 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_rollups(apps, schema_editor):
+    from django.db.models import Count, DateField, Sum
+    from django.db.models.functions import TruncDate, TruncMonth
+
+    Transaction = apps.get_model("ui", "Transaction")
+    TransactionRollup = apps.get_model("ui", "TransactionRollup")
+
+    for granularity, period in (
+        ("day", TruncDate("datetime")),
+        ("month", TruncMonth("datetime", output_field=DateField())),
+    ):
+        buckets = (
+            Transaction.objects.order_by()
+            .annotate(period=period)
+            .values("period", "category_ref")
+            .annotate(total=Sum("amount"), count=Count("id"))
+        )
+        TransactionRollup.objects.bulk_create(
+            [
+                TransactionRollup(
+                    granularity=granularity,
+                    period_start=bucket["period"],
+                    category_ref_id=bucket["category_ref"],
+                    total=bucket["total"],
+                    count=bucket["count"],
+                )
+                for bucket in buckets
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ui", "0006_dataversion"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TransactionRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "granularity",
+                    models.CharField(
+                        choices=[("day", "Day"), ("month", "Month")], max_length=5
+                    ),
+                ),
+                ("period_start", models.DateField()),
+                (
+                    "total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "category_ref",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rollups",
+                        to="ui.category",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("granularity", "period_start", "category_ref"),
+                        name="unique_rollup_bucket",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 6.0.1 on 2026-10-18 21:05
+
+from django.db import migrations, models
+
+import ui.fields
+
+# (model, field, DecimalField max_digits before the migration)
+MONEY_COLUMNS = [
+    ("Category", "total_sum", 10),
+    ("Transaction", "amount", 10),
+    ("TransactionRollup", "total", 14),
+]
+
+
+def to_cents(apps, schema_editor):
+    from django.db.models import BigIntegerField, F
+    from django.db.models.functions import Cast, Round
+
+    for model_name, name, _ in MONEY_COLUMNS:
+        model = apps.get_model("ui", model_name)
+        model.objects.update(
+            **{f"{name}_cents": Cast(Round(F(name) * 100), BigIntegerField())}
+        )
+
+
+def from_cents(apps, schema_editor):
+    from django.db.models import F, FloatField
+    from django.db.models.functions import Cast
+
+    for model_name, name, _ in MONEY_COLUMNS:
+        model = apps.get_model("ui", model_name)
+        # Float division; the DECIMAL column rounds it back to cents
+        model.objects.update(**{name: Cast(F(f"{name}_cents"), FloatField()) / 100})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ui", "0007_transactionrollup"),
+    ]
+
+    operations = [
+        *(
+            migrations.AddField(
+                model_name=model_name.lower(),
+                name=f"{name}_cents",
+                field=models.BigIntegerField(null=True),
+            )
+            for model_name, name, _ in MONEY_COLUMNS
+        ),
+        # Nullable while both representations exist, so that the migration
+        # can also be reversed
+        *(
+            migrations.AlterField(
+                model_name=model_name.lower(),
+                name=name,
+                field=models.DecimalField(
+                    decimal_places=2, max_digits=max_digits, null=True
+                ),
+            )
+            for model_name, name, max_digits in MONEY_COLUMNS
+        ),
+        migrations.RunPython(to_cents, from_cents),
+        migrations.RemoveIndex(
+            model_name="transaction",
+            name="ui_txn_catref_amt_idx",
+        ),
+        *(
+            migrations.RemoveField(model_name=model_name.lower(), name=name)
+            for model_name, name, _ in MONEY_COLUMNS
+        ),
+        *(
+            migrations.RenameField(
+                model_name=model_name.lower(),
+                old_name=f"{name}_cents",
+                new_name=name,
+            )
+            for model_name, name, _ in MONEY_COLUMNS
+        ),
+        migrations.AlterField(
+            model_name="category",
+            name="total_sum",
+            field=ui.fields.MoneyField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="transaction",
+            name="amount",
+            field=ui.fields.MoneyField(),
+        ),
+        migrations.AlterField(
+            model_name="transactionrollup",
+            name="total",
+            field=ui.fields.MoneyField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["category_ref", "amount"], name="ui_txn_catref_amt_idx"
+            ),
+        ),
+    ]
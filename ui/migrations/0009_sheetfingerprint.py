@@ -0,0 +1,32 @@
+# Generated by Django 6.0.1 on 2026-10-18 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ui", "0008_money_cents"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SheetFingerprint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("sheet", models.CharField(max_length=50, unique=True)),
+                ("digest", models.CharField(max_length=32)),
+                ("rows", models.PositiveBigIntegerField(default=0)),
+                ("ledger_version", models.PositiveBigIntegerField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
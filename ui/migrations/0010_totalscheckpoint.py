@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-18 23:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ui", "0009_sheetfingerprint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TotalsCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("last_transaction_id", models.PositiveBigIntegerField(default=0)),
+                ("rewrites_version", models.PositiveBigIntegerField(default=0)),
+                ("categories_version", models.PositiveBigIntegerField(default=0)),
+                ("checked_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
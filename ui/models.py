@@ -1,11 +1,13 @@
 ## models.py
 from django.db import models
 
+from .fields import MoneyField
+
 
 class Category(models.Model):
     category = models.CharField(max_length=100)
     subcategory = models.CharField(max_length=100)
-    total_sum = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    total_sum = MoneyField(default=0)
 
     class Meta:
         # Composite primary key using unique_together (Django doesn't support composite PK directly)
@@ -23,14 +25,39 @@ class Category(models.Model):
 
 class Transaction(models.Model):
     datetime = models.DateTimeField()
-    category = models.CharField(max_length=100)
-    subcategory = models.CharField(max_length=100)
-    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    # The composite (category_ref, ...) indexes below lead with this column,
+    # so it doesn't need an index of its own
+    category_ref = models.ForeignKey(
+        Category,
+        on_delete=models.PROTECT,
+        related_name="transactions",
+        db_index=False,
+    )
+    amount = MoneyField()
 
-    # Optional foreign key relationship to Category
-    # category_ref = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
     class Meta:
-        ordering = ["-datetime"]  # Default ordering by recent first
+        ordering = ["-datetime", "-id"]  # Default ordering by recent first
+        indexes = [
+            # Backs keyset pagination on (datetime, id) in both directions
+            models.Index(fields=["datetime", "id"], name="ui_txn_datetime_id_idx"),
+            # Per-category listing, and deletes by category
+            models.Index(
+                fields=["category_ref", "datetime"], name="ui_txn_catref_dt_idx"
+            ),
+            # Covers SUM(amount) per category without touching the table
+            models.Index(
+                fields=["category_ref", "amount"], name="ui_txn_catref_amt_idx"
+            ),
+        ]
+
+    # Use select_related("category_ref") when reading these for many rows
+    @property
+    def category(self):
+        return self.category_ref.category
+
+    @property
+    def subcategory(self):
+        return self.category_ref.subcategory
 
     def __str__(self):
         return f"{self.datetime} - {self.category} - {self.amount}"
@@ -39,3 +66,102 @@ class Transaction(models.Model):
         # You could add logic here to update the sum in Category table
         # when a transaction is saved
         super().save(*args, **kwargs)  # Create your models here.
+
+
+class TransactionRollup(models.Model):
+    """Sum and count of transactions per (period, category) bucket."""
+
+    DAY = "day"
+    MONTH = "month"
+    GRANULARITY_CHOICES = [(DAY, "Day"), (MONTH, "Month")]
+
+    granularity = models.CharField(max_length=5, choices=GRANULARITY_CHOICES)
+    period_start = models.DateField()
+    category_ref = models.ForeignKey(
+        Category, on_delete=models.CASCADE, related_name="rollups"
+    )
+    total = MoneyField(default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Also the index for range scans over one granularity
+            models.UniqueConstraint(
+                fields=["granularity", "period_start", "category_ref"],
+                name="unique_rollup_bucket",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.granularity} {self.period_start} - {self.category_ref}"
+
+
+class DataVersion(models.Model):
+    """
+    Named counters bumped by writes, so every worker process can tell when
+    its in-memory caches of that data are stale.
+    """
+
+    name = models.CharField(max_length=50, unique=True)
+    value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} v{self.value}"
+
+
+class ImportJob(models.Model):
+    """A spooled Excel upload and the state of its background import."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    file_name = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=500)
+    rows_processed = models.PositiveBigIntegerField(default=0)
+    results = models.JSONField(null=True, blank=True)
+    error = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Import {self.pk} ({self.status}) - {self.file_name}"
+
+
+class SheetFingerprint(models.Model):
+    """Digest of one workbook sheet as of the last Excel import or export."""
+
+    sheet = models.CharField(max_length=50, unique=True)
+    digest = models.CharField(max_length=32)
+    rows = models.PositiveBigIntegerField(default=0)
+    # The LEDGER version the digest describes; any later write outdates it
+    ledger_version = models.PositiveBigIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.sheet} @ ledger v{self.ledger_version}"
+
+
+class TotalsCheckpoint(models.Model):
+    """
+    How far ``check_category_totals`` has verified Category.total_sum: every
+    transaction up to ``last_transaction_id``, as of the LEDGER_REWRITES and
+    CATEGORIES versions it saw. A single row.
+    """
+
+    last_transaction_id = models.PositiveBigIntegerField(default=0)
+    rewrites_version = models.PositiveBigIntegerField(default=0)
+    categories_version = models.PositiveBigIntegerField(default=0)
+    checked_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Totals checked up to transaction {self.last_transaction_id}"
@@ -0,0 +1,71 @@
+"""
+JSON encoding shared by every API view.
+
+Bodies are compact unless the client asks for ``?pretty=1``. Decimal
+amounts are written as exact strings and datetimes as ISO 8601 by the
+encoder itself, so views hand it database values as they come out of
+``values_list`` without converting each row first. orjson is used when it
+is installed; the standard library encoder produces the same output.
+"""
+
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+CONTENT_TYPE = "application/json"
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+_compact = json.JSONEncoder(
+    default=_default, ensure_ascii=False, separators=(",", ":")
+).encode
+_indented = json.JSONEncoder(default=_default, ensure_ascii=False, indent=2).encode
+
+
+def dumps(data, pretty=False):
+    """Serialise ``data`` to UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(
+            data, default=_default, option=orjson.OPT_INDENT_2 if pretty else 0
+        )
+    return (_indented if pretty else _compact)(data).encode()
+
+
+def loads(body):
+    """Parse a JSON request body; raises ``json.JSONDecodeError``."""
+    if orjson is not None:
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def wants_pretty(request):
+    return request is not None and request.GET.get("pretty") in ("1", "true")
+
+
+def json_response(data, status=200, request=None):
+    """``data`` as a JSON response, indented if ``request`` asked for it."""
+    return HttpResponse(
+        dumps(data, pretty=wants_pretty(request)),
+        content_type=CONTENT_TYPE,
+        status=status,
+    )
+
+
+def records(fields, rows):
+    """Objects keyed by ``fields`` from ``values_list`` tuples."""
+    return [dict(zip(fields, row)) for row in rows]
@@ -0,0 +1,144 @@
+"""
+Incrementally maintained per-day and per-month transaction totals.
+
+Every write path applies its changes to the TransactionRollup buckets in
+the same atomic block as the transactions themselves: single-row ORM saves
+and deletes through the signals in ``signals.py``, and the batch endpoint
+and the Excel import's bulk writes through ``apply_rollup_deltas``.
+``rebuild_rollups`` recomputes every bucket, for generated ledgers and the
+``rebuild_rollups`` command. Time-ranged summaries then read one row per
+bucket and category instead of scanning the ledger.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, F, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from .fields import cents
+from .models import Transaction, TransactionRollup
+
+# Granularities answered from the stored buckets, and the stored
+# granularity each one is folded up from
+GRANULARITIES = {
+    "day": TransactionRollup.DAY,
+    "week": TransactionRollup.DAY,
+    "month": TransactionRollup.MONTH,
+    "year": TransactionRollup.MONTH,
+}
+
+
+def bucket_start(granularity, day):
+    """First day of the ``granularity`` bucket containing the date ``day``."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    if granularity == "year":
+        return day.replace(month=1, day=1)
+    return day
+
+
+def apply_rollup_deltas(rows):
+    """
+    Add ``(datetime, category_id, amount, count)`` deltas to their buckets.
+
+    Deltas are merged per bucket first, so each touched bucket costs one
+    UPDATE (plus an INSERT the first time it is used).
+    """
+    deltas = {}
+    for when, category_id, amount, count in rows:
+        day = timezone.localtime(when).date()
+        for granularity in (TransactionRollup.DAY, TransactionRollup.MONTH):
+            key = (granularity, bucket_start(granularity, day), category_id)
+            total, n = deltas.get(key, (Decimal("0"), 0))
+            deltas[key] = (total + amount, n + count)
+
+    for (granularity, period_start, category_id), (total, n) in deltas.items():
+        bucket = TransactionRollup.objects.filter(
+            granularity=granularity,
+            period_start=period_start,
+            category_ref_id=category_id,
+        )
+        changes = {"total": F("total") + cents(total), "count": F("count") + n}
+        if bucket.update(**changes):
+            continue
+        try:
+            with transaction.atomic():
+                TransactionRollup.objects.create(
+                    granularity=granularity,
+                    period_start=period_start,
+                    category_ref_id=category_id,
+                    total=total,
+                    count=n,
+                )
+        except IntegrityError:
+            # Another writer created the bucket first
+            bucket.update(**changes)
+
+
+def rebuild_rollups(batch_size=1000):
+    """Recompute every bucket from the Transaction table."""
+    with transaction.atomic():
+        TransactionRollup.objects.all().delete()
+        for granularity, period in (
+            (TransactionRollup.DAY, TruncDate("datetime")),
+            (TransactionRollup.MONTH, TruncMonth("datetime", output_field=DateField())),
+        ):
+            buckets = (
+                Transaction.objects.order_by()
+                .annotate(period=period)
+                .values("period", "category_ref")
+                .annotate(total=Sum("amount"), count=Count("id"))
+            )
+            TransactionRollup.objects.bulk_create(
+                (
+                    TransactionRollup(
+                        granularity=granularity,
+                        period_start=bucket["period"],
+                        category_ref_id=bucket["category_ref"],
+                        total=bucket["total"],
+                        count=bucket["count"],
+                    )
+                    for bucket in buckets.iterator()
+                ),
+                batch_size=batch_size,
+            )
+
+
+def rollup_summary(granularity, start=None, end=None):
+    """
+    Totals per ``granularity`` bucket between the dates ``start`` and ``end``.
+
+    Bounds are widened to whole buckets. Returns a list of
+    ``(period_start, {(category, subcategory): (total, count)})`` in
+    period order.
+    """
+    stored = GRANULARITIES[granularity]
+    buckets = TransactionRollup.objects.filter(granularity=stored)
+    if start is not None:
+        buckets = buckets.filter(period_start__gte=bucket_start(granularity, start))
+    if end is not None:
+        if granularity == "week":
+            end = bucket_start(granularity, end) + timedelta(days=6)
+        elif granularity == "year":
+            end = end.replace(month=12)
+        buckets = buckets.filter(period_start__lte=end)
+
+    periods = {}
+    for period_start, category, subcategory, total, count in buckets.order_by(
+        "period_start"
+    ).values_list(
+        "period_start",
+        "category_ref__category",
+        "category_ref__subcategory",
+        "total",
+        "count",
+    ):
+        totals = periods.setdefault(bucket_start(granularity, period_start), {})
+        old_total, old_count = totals.get((category, subcategory), (Decimal("0"), 0))
+        totals[(category, subcategory)] = (old_total + total, old_count + count)
+    return list(periods.items())
@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import metrics
+from .caching import CATEGORIES, LEDGER, LEDGER_REWRITES, bump_version
+from .models import Category, Transaction
+from .rollups import apply_rollup_deltas
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    # Attributes every query to the request (or job) that is current
+    connection.execute_wrappers.append(metrics.db_wrapper)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    # Per-connection pragmas; journal_mode=WAL also persists in the file
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in getattr(settings, "SQLITE_PRAGMAS", {}).items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, **kwargs):
+    # Saves through the ORM (admin, shell); bulk writes bump it themselves
+    bump_version(CATEGORIES)
+    bump_version(LEDGER)
+
+
+@receiver(pre_save, sender=Transaction)
+def remember_transaction(sender, instance, raw=False, **kwargs):
+    # The row as stored, so post_save can move it out of its old bucket
+    instance._rollup_old = None
+    if instance.pk and not raw:
+        instance._rollup_old = (
+            Transaction.objects.filter(pk=instance.pk)
+            .values_list("datetime", "category_ref_id", "amount")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Transaction)
+def transaction_saved(sender, instance, raw=False, **kwargs):
+    # Single-row ORM writes (transaction_add, admin); bulk writes update the
+    # rollups themselves
+    if raw:
+        return
+    rows = [(instance.datetime, instance.category_ref_id, instance.amount, 1)]
+    old = getattr(instance, "_rollup_old", None)
+    if old is not None:
+        when, category_id, amount = old
+        rows.append((when, category_id, -amount, -1))
+        bump_version(LEDGER_REWRITES)
+    apply_rollup_deltas(rows)
+    bump_version(LEDGER)
+
+
+@receiver(post_delete, sender=Transaction)
+def transaction_deleted(sender, instance, **kwargs):
+    apply_rollup_deltas(
+        [(instance.datetime, instance.category_ref_id, -instance.amount, -1)]
+    )
+    bump_version(LEDGER_REWRITES)
+    bump_version(LEDGER)
@@ -1,3 +1,750 @@
-from django.test import TestCase
+import os
+import tempfile
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from openpyxl import load_workbook
+
+from . import caching, columnar, jobs, totals
+from .Export import ImportValidationError, create_excel_response, import_workbook
+from .models import Category, ImportJob, Transaction, TransactionRollup
+from .rollups import rebuild_rollups
+
+SHEETS = {"Category": Category, "Transaction": Transaction}
+
+
+def reset_process_caches():
+    # DataVersion counters roll back with each test, so caches keyed by
+    # them could otherwise outlive the rows they were built from
+    caching._category_index = None
+    caching.response_cache._entries.clear()
+    columnar._ledger_columns = None
+
+
+class ExcelRoundTripTests(TestCase):
+    def setUp(self):
+        self.food = Category.objects.create(category="Food", subcategory="Groceries")
+        self.rent = Category.objects.create(category="Home", subcategory="Rent")
+        when = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+        # Several rows in one subcategory, two of them identical
+        for amount in ("10.00", "10.00", "25.50", "3.25"):
+            Transaction.objects.create(
+                datetime=when, category_ref=self.food, amount=Decimal(amount)
+            )
+        Transaction.objects.create(
+            datetime=when, category_ref=self.rent, amount=Decimal("900.00")
+        )
+
+    def export_workbook(self):
+        response = create_excel_response(RequestFactory().get("/"))
+        return load_workbook(BytesIO(b"".join(response.streaming_content)))
+
+    def import_workbook(self, workbook):
+        output = BytesIO()
+        workbook.save(output)
+        output.seek(0)
+        return import_workbook(output, SHEETS)
+
+    def assertLedger(self, expected):
+        rows = sorted(
+            Transaction.objects.values_list(
+                "category_ref__subcategory", "amount"
+            ).order_by()
+        )
+        self.assertEqual(rows, sorted(expected))
+        for category in Category.objects.all():
+            total = category.transactions.aggregate(total=Sum("amount"))["total"]
+            self.assertEqual(category.total_sum, total or 0)
+
+    def test_round_trip_keeps_every_transaction(self):
+        before = sorted(Transaction.objects.values_list("pk", flat=True))
+        expected = [
+            ("Groceries", Decimal("10.00")),
+            ("Groceries", Decimal("10.00")),
+            ("Groceries", Decimal("25.50")),
+            ("Groceries", Decimal("3.25")),
+            ("Rent", Decimal("900.00")),
+        ]
+
+        workbook = self.export_workbook()
+        results = self.import_workbook(workbook)
+        self.assertEqual(results["Transaction"]["skipped"], 5)
+        self.assertEqual(
+            sorted(Transaction.objects.values_list("pk", flat=True)), before
+        )
+        self.assertLedger(expected)
+
+        # New rows without an id, one identical to an existing row
+        sheet = workbook["Transaction"]
+        sheet.append([None, "2025-01-01 12:00:00", "Food", "Groceries", 10])
+        sheet.append([None, "2025-02-01 08:30:00", "Food", "Groceries", 7.5])
+        results = self.import_workbook(workbook)
+        self.assertEqual(results["Transaction"]["created"], 2)
+        self.assertEqual(results["Transaction"]["deleted"], 0)
+        self.assertLedger(
+            expected + [("Groceries", Decimal("10.00")), ("Groceries", Decimal("7.50"))]
+        )
+
+    def rollup_buckets(self):
+        return {
+            (row.granularity, row.period_start, row.category_ref_id): (
+                row.total,
+                row.count,
+            )
+            for row in TransactionRollup.objects.filter(count__gt=0)
+        }
+
+    def test_import_moves_rollups_with_the_changed_rows(self):
+        workbook = self.export_workbook()
+        sheet = workbook["Transaction"]
+        rows = list(sheet.iter_rows(min_row=2))
+        rows[0][4].value = 12.5  # amount edited
+        rows[1][3].value = "Rent"  # moved to another category
+        rows[1][2].value = "Home"
+        rows[2][1].value = "2025-03-05 09:00:00"  # moved to another month
+        sheet.delete_rows(rows[3][0].row)  # deleted
+        sheet.append([None, "2025-02-01 08:30:00", "Home", "Rent", 40])
+
+        results = self.import_workbook(workbook)["Transaction"]
+        self.assertEqual(
+            (results["created"], results["updated"], results["deleted"]), (1, 3, 1)
+        )
+        incremental = self.rollup_buckets()
+        rebuild_rollups()
+        self.assertEqual(incremental, self.rollup_buckets())
+
+    def test_sheet_without_ids_does_not_duplicate(self):
+        workbook = self.export_workbook()
+        workbook["Transaction"].delete_cols(1)
+        results = self.import_workbook(workbook)
+        self.assertEqual(results["Transaction"]["created"], 0)
+        self.assertEqual(results["Transaction"]["deleted"], 0)
+        self.assertEqual(Transaction.objects.count(), 5)
+
+    def test_header_error_does_not_list_the_optional_id(self):
+        workbook = self.export_workbook()
+        workbook["Transaction"].cell(row=1, column=5).value = "amt"
+        with self.assertRaises(ValueError) as raised:
+            self.import_workbook(workbook)
+        message = str(raised.exception)
+        self.assertIn("Extra columns: ['amt']", message)
+        self.assertIn("Missing columns: ['amount']", message)
+
+    def test_amount_with_more_than_two_decimal_places_is_rejected(self):
+        workbook = self.export_workbook()
+        workbook["Transaction"].cell(row=2, column=5).value = 10.255
+        with self.assertRaises(ImportValidationError) as raised:
+            self.import_workbook(workbook)
+        (error,) = raised.exception.report.errors
+        self.assertEqual(error["column"], "amount")
+        self.assertFalse(Transaction.objects.filter(amount=Decimal("10.26")).exists())
+
+    def test_legacy_xls_upload_is_rejected(self):
+        upload = SimpleUploadedFile("ledger.xls", b"\xd0\xcf\x11\xe0")
+        response = self.client.post(reverse("excel_import"), {"file": upload})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ImportJob.objects.exists())
+
+
+class TransactionBatchTests(TestCase):
+    def setUp(self):
+        reset_process_caches()
+        self.food = Category.objects.create(category="Food", subcategory="Groceries")
+
+    def post_batch(self, rows):
+        return self.client.post(
+            reverse("transaction_batch_add"), rows, content_type="application/json"
+        )
+
+    def row(self, amount):
+        return {"category": "Food", "subcategory": "Groceries", "amount": amount}
+
+    def assertTotalsMatchLedger(self):
+        ledger = Transaction.objects.aggregate(total=Sum("amount"))["total"] or 0
+        self.food.refresh_from_db()
+        self.assertEqual(self.food.total_sum, ledger)
+        for granularity in (TransactionRollup.DAY, TransactionRollup.MONTH):
+            rollups = TransactionRollup.objects.filter(
+                granularity=granularity
+            ).aggregate(total=Sum("total"))["total"]
+            self.assertEqual(rollups or 0, ledger)
+
+    def test_all_valid_rows_are_created(self):
+        rows = [self.row("1.50"), self.row(2), dict(self.row("3.25"))]
+        rows[2]["datetime"] = "2025-02-03T04:05:06"
+        response = self.post_batch({"transactions": rows})
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual(
+            (body["success"], body["created"], body["failed"]), (True, 3, 0)
+        )
+        self.assertEqual([row["index"] for row in body["results"]], [0, 1, 2])
+        ids = [row["id"] for row in body["results"]]
+        self.assertEqual(
+            list(Transaction.objects.order_by("id").values_list("id", flat=True)), ids
+        )
+        self.assertEqual(
+            Transaction.objects.get(pk=ids[2]).datetime,
+            datetime(2025, 2, 3, 4, 5, 6, tzinfo=timezone.utc),
+        )
+        self.assertTotalsMatchLedger()
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        body = b"\n".join(
+            [
+                json.dumps(self.row("5.00")).encode(),
+                b"{not json",
+                json.dumps({**self.row("1.00"), "subcategory": "Rent"}).encode(),
+                json.dumps({**self.row("1.00"), "datetime": "soon"}).encode(),
+                json.dumps(self.row("-4")).encode(),
+            ]
+        )
+        response = self.client.post(
+            reverse("transaction_batch_add"),
+            body,
+            content_type="application/x-ndjson",
+        )
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual(
+            [row["status"] for row in results],
+            ["created", "error", "error", "error", "error"],
+        )
+        self.assertEqual(results[1]["error"], "Invalid JSON data")
+        self.assertIn("does not exist", results[2]["error"])
+        self.assertIn("datetime", results[3]["error"])
+        self.assertIn("positive", results[4]["error"])
+        self.assertEqual(Transaction.objects.get().amount, Decimal("5.00"))
+        self.assertTotalsMatchLedger()
+
+    def test_malformed_batches_are_rejected(self):
+        for body in ({"transactions": "nope"}, {"rows": []}, 42):
+            with self.subTest(body=body):
+                self.assertEqual(self.post_batch(body).status_code, 400)
+        with mock.patch("ui.views.MAX_BATCH_ROWS", 2):
+            response = self.post_batch([self.row(1)] * 3)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_amount_finer_than_a_cent_is_rejected(self):
+        response = self.post_batch([self.row("0.005"), self.row("0.005")])
+        self.assertEqual(response.status_code, 400)
+        results = response.json()["results"]
+        self.assertEqual([row["status"] for row in results], ["error", "error"])
+        self.assertIn("decimal places", results[0]["error"])
+        self.assertFalse(Transaction.objects.exists())
+        self.assertTotalsMatchLedger()
+
+    def test_amount_too_large_for_cents_is_a_row_error(self):
+        response = self.post_batch([self.row("1e20"), self.row("12.30")])
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["created"], body["failed"]), (1, 1))
+        self.assertEqual(body["results"][0]["status"], "error")
+        self.assertEqual(body["results"][1]["status"], "created")
+        self.assertEqual(Transaction.objects.get().amount, Decimal("12.30"))
+        self.assertTotalsMatchLedger()
+
+
+class TransactionAddTests(TestCase):
+    def setUp(self):
+        reset_process_caches()
+        Category.objects.create(category="Food", subcategory="Groceries")
+
+    def post(self, amount):
+        return self.client.post(
+            reverse("transaction_add"),
+            {"category": "Food", "subcategory": "Groceries", "amount": amount},
+            content_type="application/json",
+        )
+
+    def test_response_echoes_the_stored_amount(self):
+        response = self.post("12.3")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["transaction"]["amount"], "12.30")
+        self.assertEqual(Transaction.objects.get().amount, Decimal("12.30"))
+
+    def test_amount_finer_than_a_cent_is_rejected(self):
+        response = self.post("1.005")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Transaction.objects.exists())
+
+
+class CategoryTotalsCheckTests(TestCase):
+    def setUp(self):
+        self.food = Category.objects.create(category="Food", subcategory="Groceries")
+        self.rent = Category.objects.create(category="Home", subcategory="Rent")
+        self.add(self.food, "10.00")
+        self.add(self.rent, "900.00")
+        # Creates through the ORM leave total_sum to the first (full) check
+        first = totals.check_category_totals()
+        self.assertTrue(first["full"])
+        self.assertEqual(len(first["drifted"]), 2)
+
+    def add(self, category, amount):
+        return Transaction.objects.create(
+            datetime=datetime(2025, 1, 1, tzinfo=timezone.utc),
+            category_ref=category,
+            amount=Decimal(amount),
+        )
+
+    def test_incremental_check_covers_only_new_transactions(self):
+        self.add(self.food, "2.50")
+        result = totals.check_category_totals()
+        self.assertFalse(result["full"])
+        self.assertEqual(result["checked"], 1)
+        (drift,) = result["drifted"]
+        self.assertEqual(
+            (drift["subcategory"], drift["stored"], drift["actual"]),
+            ("Groceries", Decimal("10.00"), Decimal("12.50")),
+        )
+        self.food.refresh_from_db()
+        self.assertEqual(self.food.total_sum, Decimal("12.50"))
+
+        result = totals.check_category_totals()
+        self.assertEqual((result["full"], result["checked"]), (False, 0))
+
+    def test_full_check_finds_drift_without_new_transactions(self):
+        Category.objects.filter(pk=self.rent.pk).update(total_sum=Decimal("1.00"))
+        self.assertEqual(totals.check_category_totals()["drifted"], [])
+
+        result = totals.check_category_totals(full=True)
+        self.assertEqual((result["full"], result["checked"]), (True, 2))
+        self.assertEqual([row["id"] for row in result["drifted"]], [self.rent.pk])
+        self.rent.refresh_from_db()
+        self.assertEqual(self.rent.total_sum, Decimal("900.00"))
+
+    def test_rewrites_force_a_full_check(self):
+        transaction = Transaction.objects.get(category_ref=self.rent)
+        transaction.amount = Decimal("950.00")
+        transaction.save()
+        result = totals.check_category_totals()
+        self.assertEqual((result["full"], result["checked"]), (True, 2))
+        self.assertEqual(len(result["drifted"]), 1)
+
+    def test_dry_run_neither_repairs_nor_advances(self):
+        self.add(self.food, "2.50")
+        out = StringIO()
+        call_command("check_totals", "--dry-run", stdout=out)
+        self.assertIn("Groceries: 10.00 -> 12.50", out.getvalue())
+        self.assertIn("Incremental check of 1 categories: 1 drifted", out.getvalue())
+        self.food.refresh_from_db()
+        self.assertEqual(self.food.total_sum, Decimal("10.00"))
+
+        result = totals.check_category_totals()
+        self.assertEqual((result["checked"], len(result["drifted"])), (1, 1))
+
+
+class TotalsCheckerTests(TestCase):
+    def test_every_nth_periodic_check_is_full(self):
+        calls = []
+
+        def check(full=False):
+            calls.append(full)
+            return {"full": full, "checked": 0, "drifted": []}
+
+        sleeps = iter(range(6))
+        with mock.patch.object(
+            totals.time, "sleep", side_effect=lambda _: next(sleeps)
+        ), mock.patch.object(totals, "check_category_totals", check):
+            with self.assertRaises(StopIteration):
+                totals._run_checker(60, 3)
+        self.assertEqual(calls, [False, False, True, False, False, True])
+
+
+class ImportJobTests(TestCase):
+    def spooled_job(self):
+        fd, path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        self.addCleanup(lambda: os.path.exists(path) and os.remove(path))
+        return ImportJob.objects.create(
+            file_name="ledger.xlsx", file_path=path, status=ImportJob.RUNNING
+        )
+
+    def test_jobs_of_a_dead_worker_are_failed(self):
+        orphan = self.spooled_job()
+        owned = self.spooled_job()
+        with open(owned.file_path, "rb") as held:
+            self.assertTrue(jobs._try_lock(held))
+            self.assertEqual(jobs.recover_import_jobs(), 1)
+
+        orphan.refresh_from_db()
+        self.assertEqual(orphan.status, ImportJob.FAILED)
+        self.assertFalse(os.path.exists(orphan.file_path))
+        owned.refresh_from_db()
+        self.assertEqual(owned.status, ImportJob.RUNNING)
+        self.assertTrue(os.path.exists(owned.file_path))
+
+    def test_upload_while_the_database_is_locked_is_503(self):
+        upload = SimpleUploadedFile("ledger.xlsx", b"PK")
+        with mock.patch(
+            "ui.Export.enqueue_import",
+            side_effect=OperationalError("database is locked"),
+        ):
+            response = self.client.post(reverse("excel_import"), {"file": upload})
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response)
+
+
+class LedgerColumnsTests(TestCase):
+    def setUp(self):
+        reset_process_caches()
+        self.food = Category.objects.create(category="Food", subcategory="Groceries")
+        self.when = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+        for pk in (10, 20):
+            self.add(pk, "1.00")
+
+    def add(self, pk, amount):
+        Transaction.objects.create(
+            pk=pk, datetime=self.when, category_ref=self.food, amount=Decimal(amount)
+        )
+
+    def test_rows_committed_below_the_loaded_ids_arrive_on_reload(self):
+        self.assertEqual(len(columnar.ledger_columns()), 2)
+        self.add(30, "2.00")
+        # A concurrent writer committing id 15 after 20 was loaded
+        self.add(15, "4.00")
+        columns = columnar.ledger_columns()
+        self.assertEqual(len(columns), 3)
+        self.assertTrue(columns.extended)
+
+        later = columns.loaded_at + 301
+        with mock.patch.object(columnar, "monotonic", return_value=later):
+            columns = columnar.ledger_columns()
+        self.assertEqual(len(columns), 4)
+        self.assertFalse(columns.extended)
+        self.assertEqual(int(columns.cents.sum()), 800)
+
+
+class TransactionCursorTests(TestCase):
+    def setUp(self):
+        food = Category.objects.create(category="Food", subcategory="Groceries")
+        start = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+        # Runs of equal datetimes straddle the page edges
+        for minutes in (0, 0, 0, 5, 5, 10, 10, 10, 10, 20):
+            Transaction.objects.create(
+                datetime=start + timedelta(minutes=minutes),
+                category_ref=food,
+                amount=Decimal("1.00"),
+            )
+        self.expected = list(
+            Transaction.objects.order_by("-datetime", "-id").values_list(
+                "id", flat=True
+            )
+        )
+
+    def page(self, cursor="", per_page=3):
+        response = self.client.get(
+            reverse("transaction_api"), {"cursor": cursor, "per_page": per_page}
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def ids(self, page):
+        return [row["id"] for row in page["transactions"]]
+
+    def test_next_and_prev_walk_every_row_once(self):
+        pages = [self.page()]
+        self.assertFalse(pages[0]["has_previous"])
+        while pages[-1]["has_next"]:
+            pages.append(self.page(pages[-1]["next"]))
+        self.assertEqual(sum(map(self.ids, pages), []), self.expected)
+        self.assertEqual([len(self.ids(page)) for page in pages], [3, 3, 3, 1])
+
+        backwards = [pages[-1]]
+        while backwards[-1]["has_previous"]:
+            backwards.append(self.page(backwards[-1]["prev"]))
+        self.assertEqual(
+            [self.ids(page) for page in reversed(backwards)],
+            [self.ids(page) for page in pages],
+        )
+        self.assertTrue(backwards[-1]["has_next"])
+
+    def test_invalid_cursors_are_rejected(self):
+        def encoded(payload):
+            return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+        for cursor in (
+            "not a cursor",
+            encoded(["sideways", "2025-01-01T12:00:00+00:00", 1]),
+            encoded(["next", "yesterday", 1]),
+            encoded(["next", "2025-01-01T12:00:00+00:00", "x"]),
+            encoded({"direction": "next"}),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(
+                    reverse("transaction_api"), {"cursor": cursor}
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()["error"], "Invalid cursor")
+
+
+class RollupSummaryTests(TestCase):
+    def setUp(self):
+        reset_process_caches()
+        food = Category.objects.create(category="Food", subcategory="Groceries")
+        rent = Category.objects.create(category="Home", subcategory="Rent")
+        for day, category, amount in (
+            ("2024-12-30", food, "1.00"),  # Monday
+            ("2024-12-31", rent, "8.00"),
+            ("2025-01-01", food, "16.00"),
+            ("2025-01-05", food, "2.00"),  # Sunday, same week as 2024-12-30
+            ("2025-01-06", food, "4.00"),  # Monday
+            ("2025-12-31", rent, "32.00"),
+        ):
+            Transaction.objects.create(
+                datetime=datetime.fromisoformat(day).replace(
+                    hour=23, minute=59, tzinfo=timezone.utc
+                ),
+                category_ref=category,
+                amount=Decimal(amount),
+            )
+
+    def summary(self, granularity, **bounds):
+        response = self.client.get(
+            reverse("rollup_summary_api"), {"granularity": granularity, **bounds}
+        )
+        self.assertEqual(response.status_code, 200)
+        return [
+            (period["period"], period["total"], period["count"])
+            for period in response.json()["periods"]
+        ]
+
+    def test_weeks_fold_days_from_monday(self):
+        self.assertEqual(
+            self.summary("week"),
+            [
+                ("2024-12-30", "27.00", 4),
+                ("2025-01-06", "4.00", 1),
+                ("2025-12-29", "32.00", 1),
+            ],
+        )
+
+    def test_years_fold_months(self):
+        self.assertEqual(
+            self.summary("year"),
+            [("2024-01-01", "9.00", 2), ("2025-01-01", "54.00", 4)],
+        )
+
+    def test_bounds_widen_to_whole_buckets(self):
+        # A Wednesday selects its whole week, Monday to Sunday
+        self.assertEqual(
+            self.summary("week", **{"from": "2025-01-01", "to": "2025-01-01"}),
+            [("2024-12-30", "27.00", 4)],
+        )
+        self.assertEqual(
+            self.summary("year", **{"from": "2025-06-15", "to": "2025-06-15"}),
+            [("2025-01-01", "54.00", 4)],
+        )
+        self.assertEqual(
+            self.summary("month", **{"from": "2024-12-31", "to": "2025-01-01"}),
+            [("2024-12-01", "9.00", 2), ("2025-01-01", "22.00", 3)],
+        )
+
+    def test_day_bounds_are_inclusive(self):
+        self.assertEqual(
+            self.summary("day", **{"from": "2024-12-31", "to": "2025-01-01"}),
+            [("2024-12-31", "8.00", 1), ("2025-01-01", "16.00", 1)],
+        )
+        self.assertEqual(
+            self.summary("day", **{"from": "2025-01-02", "to": "2025-01-04"}), []
+        )
+
+    def test_invalid_parameters_are_rejected(self):
+        for params in (
+            {"granularity": "quarter"},
+            {"granularity": "day", "from": "2025-13-01"},
+            {"granularity": "day", "to": "tomorrow"},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(reverse("rollup_summary_api"), params)
+                self.assertEqual(response.status_code, 400)
+
+
+class ConditionalResponseTests(TestCase):
+    def setUp(self):
+        reset_process_caches()
+        Category.objects.create(category="Food", subcategory="Groceries")
+
+    def summary(self, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client.get(reverse("category_summary_api"), **headers)
+
+    def test_matching_etag_is_answered_with_304(self):
+        first = self.summary()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first["Cache-Control"], "no-cache")
+        etag = first["ETag"]
+
+        again = self.summary(etag)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again["ETag"], etag)
+        self.assertEqual(again.content, b"")
+        self.assertEqual(self.summary(f'"other", {etag}').status_code, 304)
+        self.assertEqual(self.summary('"other"').status_code, 200)
+
+    def test_unchanged_body_comes_from_the_cache(self):
+        self.summary()
+        hits = caching.response_cache.hits
+        self.summary()
+        self.assertEqual(caching.response_cache.hits, hits + 1)
+
+    def test_write_invalidates_etag_and_body(self):
+        first = self.summary()
+        self.assertEqual(first.json()["grand_total"], "0.00")
+        response = self.client.post(
+            reverse("transaction_add"),
+            {"category": "Food", "subcategory": "Groceries", "amount": "7.25"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+
+        after = self.summary(first["ETag"])
+        self.assertEqual(after.status_code, 200)
+        self.assertNotEqual(after["ETag"], first["ETag"])
+        self.assertEqual(after.json()["grand_total"], "7.25")
+
+    def test_category_etag_follows_the_category_version(self):
+        first = self.client.get(reverse("get_categories"))
+        etag = first["ETag"]
+        self.assertEqual(
+            self.client.get(
+                reverse("get_categories"), HTTP_IF_NONE_MATCH=etag
+            ).status_code,
+            304,
+        )
+        Category.objects.create(category="Home", subcategory="Rent")
+        after = self.client.get(reverse("get_categories"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(after.status_code, 200)
+        self.assertEqual(after.json()["Home"], ["Rent"])
+
+
+class ColumnarReportTests(TestCase):
+    def setUp(self):
+        reset_process_caches()
+        self.food = Category.objects.create(category="Food", subcategory="Groceries")
+        self.rent = Category.objects.create(category="Home", subcategory="Rent")
+        for day, category, amount in (
+            ("2025-01-03", self.food, "12.40"),
+            ("2025-01-31", self.rent, "900.00"),
+            ("2025-02-01", self.food, "7.35"),
+            ("2025-02-14", self.food, "20.00"),
+            ("2025-03-02", self.rent, "900.00"),
+        ):
+            self.add(day, category, amount)
+
+    def add(self, day, category, amount):
+        return Transaction.objects.create(
+            datetime=datetime.fromisoformat(f"{day}T18:30:00+00:00"),
+            category_ref=category,
+            amount=Decimal(amount),
+        )
+
+    def report(self, name, **params):
+        response = self.client.get(reverse("analytics_api", args=[name]), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def assertReportsMatchOrm(self):
+        monthly = (
+            Transaction.objects.annotate(month=TruncMonth("datetime"))
+            .values("month")
+            .annotate(total=Sum("amount"), count=Count("id"))
+            .order_by("month")
+        )
+        self.assertEqual(
+            [
+                (row["month"], Decimal(row["total"]), row["count"])
+                for row in self.report("monthly")["months"]
+            ],
+            [
+                (row["month"].date().isoformat(), row["total"], row["count"])
+                for row in monthly
+            ],
+        )
+        subcategories = (
+            Transaction.objects.values(
+                "category_ref__category", "category_ref__subcategory"
+            )
+            .annotate(total=Sum("amount"), count=Count("id"))
+            .order_by("category_ref__category", "category_ref__subcategory")
+        )
+        report = self.report("subcategories")
+        self.assertEqual(
+            [
+                (
+                    row["category"],
+                    row["subcategory"],
+                    Decimal(row["total"]),
+                    row["count"],
+                )
+                for row in report["subcategories"]
+            ],
+            [
+                (
+                    row["category_ref__category"],
+                    row["category_ref__subcategory"],
+                    row["total"],
+                    row["count"],
+                )
+                for row in subcategories
+            ],
+        )
+        self.assertEqual(
+            Decimal(report["grand_total"]),
+            Transaction.objects.aggregate(total=Sum("amount"))["total"],
+        )
+
+    def test_reports_match_the_orm_across_appends_and_reloads(self):
+        self.assertReportsMatchOrm()
+        loaded = columnar.ledger_columns()
+
+        self.add("2025-03-20", self.food, "3.10")
+        self.assertReportsMatchOrm()
+        self.assertTrue(columnar.ledger_columns().extended)
+
+        # An edit moves LEDGER_REWRITES and forces a reload
+        moved = Transaction.objects.get(amount=Decimal("7.35"))
+        moved.datetime = datetime(2025, 3, 1, tzinfo=timezone.utc)
+        moved.save()
+        self.assertReportsMatchOrm()
+        reloaded = columnar.ledger_columns()
+        self.assertFalse(reloaded.extended)
+        self.assertIsNot(reloaded, loaded)
+
+    def test_filters_and_split_by_category(self):
+        report = self.report(
+            "monthly", by="category", category="Food", **{"from": "2025-01-04"}
+        )
+        self.assertEqual(
+            [
+                (row["month"], row["subcategory"], row["total"])
+                for row in report["months"]
+            ],
+            [("2025-02-01", "Groceries", "27.35")],
+        )
+        self.assertEqual(report["grand_total"], "27.35")
+
+    def test_moving_average_covers_the_window_before_the_range(self):
+        days = self.report(
+            "moving-average", window=3, **{"from": "2025-02-01", "to": "2025-02-03"}
+        )["days"]
+        self.assertEqual(
+            [(row["day"], row["total"], row["moving_average"]) for row in days],
+            [
+                ("2025-02-01", "7.35", "302.45"),
+                ("2025-02-02", "0.00", "302.45"),
+                ("2025-02-03", "0.00", "2.45"),
+            ],
+        )
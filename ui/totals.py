@@ -0,0 +1,165 @@
+"""
+Category.total_sum, the denormalised sum of each category's transactions.
+
+``transaction_add`` and the batch endpoint keep it up to date with
+``F("total_sum") + cents(amount)``, and the Excel import recomputes it
+here from the ledger, in one UPDATE over the categories that are off.
+Admin edits and deletes, and any raw SQL, do not maintain it;
+``check_category_totals`` finds and repairs that drift, from the
+``check_totals`` command or every ``TOTALS_CHECK_INTERVAL`` seconds in
+each web worker, where every ``TOTALS_FULL_CHECK_EVERY``-th run checks all
+categories.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.db.transaction import atomic
+
+from .caching import CATEGORIES, LEDGER, LEDGER_REWRITES, bump_version, get_version
+from .fields import MoneyField
+from .models import Category, TotalsCheckpoint, Transaction
+
+logger = logging.getLogger(__name__)
+
+
+def ledger_total():
+    """The sum of a Category row's transactions, as an expression on Category."""
+    totals = (
+        Transaction.objects.filter(category_ref=OuterRef("pk"))
+        .order_by()
+        .values("category_ref")
+        .annotate(total=Sum("amount"))
+        .values("total")
+    )
+    return Coalesce(Subquery(totals), 0, output_field=MoneyField())
+
+
+def recompute_category_totals(categories=None):
+    """
+    Set ``total_sum`` of ``categories`` (default: all) from the ledger.
+
+    Only rows whose stored total differs are written. Returns their number.
+    """
+    if categories is None:
+        categories = Category.objects.all()
+    total = ledger_total()
+    return categories.exclude(total_sum=total).update(total_sum=total)
+
+
+def check_category_totals(full=False, repair=True):
+    """
+    Compare Category.total_sum with the ledger, and repair the drift.
+
+    Only the categories of transactions added since the last check are
+    re-aggregated. Every category is checked if ``full`` is set, or if
+    transactions were edited or deleted, or categories changed, since then
+    (LEDGER_REWRITES or CATEGORIES moved), as those may touch any total.
+    With ``repair`` the drifted totals are rewritten in one UPDATE and the
+    checkpoint advances; without it nothing is written.
+
+    Returns ``{"full", "checked", "drifted"}``, where ``drifted`` lists
+    ``{id, category, subcategory, stored, actual}`` per category.
+    """
+    with atomic():
+        checkpoint = TotalsCheckpoint.objects.first() or TotalsCheckpoint()
+        versions = (get_version(LEDGER_REWRITES), get_version(CATEGORIES))
+        # Ids are handed out in commit order on SQLite; with concurrent
+        # writers elsewhere a row can commit below last_id after this check,
+        # and only the periodic full check (TOTALS_FULL_CHECK_EVERY) sees it
+        last_id = Transaction.objects.aggregate(last=Max("pk"))["last"] or 0
+        full = (
+            full
+            or checkpoint.pk is None
+            or versions != (checkpoint.rewrites_version, checkpoint.categories_version)
+        )
+
+        categories = Category.objects.all()
+        if not full:
+            if last_id == checkpoint.last_transaction_id:
+                categories = categories.none()
+            else:
+                touched = Transaction.objects.filter(
+                    pk__gt=checkpoint.last_transaction_id, pk__lte=last_id
+                ).values("category_ref")
+                categories = categories.filter(pk__in=touched)
+
+        drifted = [
+            {
+                "id": pk,
+                "category": category,
+                "subcategory": subcategory,
+                "stored": stored,
+                "actual": actual,
+            }
+            for pk, category, subcategory, stored, actual in categories.annotate(
+                actual=ledger_total()
+            )
+            .exclude(total_sum=F("actual"))
+            .order_by("category", "subcategory")
+            .values_list("pk", "category", "subcategory", "total_sum", "actual")
+        ]
+        checked = categories.count()
+
+        if repair:
+            if drifted:
+                recompute_category_totals(
+                    Category.objects.filter(pk__in=[row["id"] for row in drifted])
+                )
+                bump_version(LEDGER)
+            checkpoint.last_transaction_id = last_id
+            checkpoint.rewrites_version, checkpoint.categories_version = versions
+            checkpoint.save()
+
+    return {"full": full, "checked": checked, "drifted": drifted}
+
+
+def _run_checker(interval, full_every):
+    runs = 0
+    while True:
+        time.sleep(interval)
+        runs += 1
+        close_old_connections()
+        try:
+            result = check_category_totals(
+                full=bool(full_every) and runs % full_every == 0
+            )
+        except Exception:
+            logger.exception("Category total check failed")
+            continue
+        for row in result["drifted"]:
+            logger.warning(
+                "Repaired total_sum of %s / %s: %s -> %s",
+                row["category"],
+                row["subcategory"],
+                row["stored"],
+                row["actual"],
+            )
+
+
+_checker = None
+_checker_lock = threading.Lock()
+
+
+def start_totals_checker():
+    """Start the periodic check in this process if TOTALS_CHECK_INTERVAL is set."""
+    global _checker
+    interval = getattr(settings, "TOTALS_CHECK_INTERVAL", None)
+    if not interval:
+        return None
+    with _checker_lock:
+        if _checker is None:
+            full_every = getattr(settings, "TOTALS_FULL_CHECK_EVERY", 10)
+            _checker = threading.Thread(
+                target=_run_checker,
+                args=(interval, full_every),
+                name="totals-check",
+                daemon=True,
+            )
+            _checker.start()
+    return _checker
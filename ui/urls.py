@@ -7,10 +7,25 @@ urlpatterns = [
     path(
         "api/category-summary/", views.category_summary_api, name="category_summary_api"
     ),
+    path("api/summary/", views.rollup_summary_api, name="rollup_summary_api"),
+    path("api/analytics/<str:report>/", views.analytics_api, name="analytics_api"),
+    path("metrics", views.metrics_view, name="metrics"),
+    path("api/cache-stats/", views.cache_stats_api, name="cache_stats_api"),
     path("api/category", views.get_categories_json, name="get_categories"),
     path("api/transaction-add", views.transaction_add, name="transaction_add"),
     path("api/transactions/", views.transaction_api, name="transaction_api"),
+    path(
+        "api/transactions/batch",
+        views.transaction_batch_add,
+        name="transaction_batch_add",
+    ),
     path("api/typst-json/", Export.export_to_json, name="export_to_json"),
     path("api/excel-export/", Export.create_excel_response, name="excel_export"),
     path("api/excel-import/", Export.upload_excel, name="excel_import"),
+    path(
+        "api/excel-import/<int:job_id>/",
+        Export.import_job_status,
+        name="excel_import_status",
+    ),
+    path("api/export/<str:table>/", Export.export_table, name="table_export"),
 ]
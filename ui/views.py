@@ -1,17 +1,41 @@
+import asyncio
+import base64
+import binascii
 import json
 import subprocess
-from datetime import datetime
-from decimal import Decimal, InvalidOperation
-
-from django.core.paginator import Paginator
+from datetime import date, datetime
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
 from django.core.serializers import serialize
-from django.db.models import DecimalField, F, Sum
-from django.http import HttpResponse, JsonResponse
+from django.db.models import F, Q, Sum
+from django.db.transaction import atomic
+from django.http import HttpResponse, HttpResponseNotModified
 from django.shortcuts import render
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET, require_POST
 
+from . import columnar
+from .caching import (
+    acached_response,
+    acategory_index,
+    cached_response,
+    category_index,
+    etag_matches,
+    response_cache,
+)
+from .fields import MoneyField, cents, to_money
+from .metrics import render_metrics
 from .models import *
+from .responses import dumps, json_response, loads, records, wants_pretty
+from .rollups import GRANULARITIES, rollup_summary
+from .writebuffer import bulk_add_transactions, get_write_buffer
 
 
 def home(request):
@@ -22,58 +46,326 @@ def home(request):
     return render(request, "ui/home.html", context)
 
 
-@require_GET
-def category_summary_api(request):
+async def _category_summary(pretty=False):
     # Query all categories
     categories = Category.objects.all().order_by("category", "subcategory")
 
     # Calculate grand total in a single query
-    grand_total_result = categories.aggregate(
-        total=Sum("total_sum", output_field=DecimalField())
-    )
+    grand_total_result = await categories.aaggregate(total=Sum("total_sum"))
     grand_total = grand_total_result["total"] or Decimal("0.00")
 
     # Build the categories dictionary
     categories_dict = {}
 
-    for cat in categories:
-        main_cat = cat.category
-        sub_cat = cat.subcategory
-
+    rows = categories.values_list("category", "subcategory", "total_sum")
+    async for main_cat, sub_cat, total_sum in rows:
         if main_cat not in categories_dict:
             categories_dict[main_cat] = {}
 
-        categories_dict[main_cat][sub_cat] = float(cat.total_sum)
+        categories_dict[main_cat][sub_cat] = total_sum
 
     # Prepare response
-    data = {"categories": categories_dict, "grand_total": float(grand_total)}
-    print(data)
-    return JsonResponse(data)
+    data = {"categories": categories_dict, "grand_total": grand_total}
+    return dumps(data, pretty)
+
+
+@require_GET
+async def category_summary_api(request):
+    # Rebuilt only after a write; otherwise served from the response cache
+    pretty = wants_pretty(request)
+    return await acached_response(
+        request, "category-summary", lambda: _category_summary(pretty)
+    )
+
+
+def _date_bounds(request):
+    """``{"from": date or None, "to": date or None}`` from the query string."""
+    bounds = {}
+    for param in ("from", "to"):
+        value = request.GET.get(param)
+        if not value:
+            bounds[param] = None
+            continue
+        try:
+            bounds[param] = date.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"Invalid {param} date, expected YYYY-MM-DD")
+    return bounds
+
+
+@require_GET
+def rollup_summary_api(request):
+    """
+    Category totals per period, answered from the rollup buckets.
+
+    Query parameters: ``granularity`` (day, week, month or year; default
+    month) and optional ISO dates ``from`` / ``to``, both inclusive.
+    """
+    granularity = request.GET.get("granularity", "month")
+    if granularity not in GRANULARITIES:
+        return json_response(
+            {"error": f"granularity must be one of {', '.join(GRANULARITIES)}"},
+            status=400,
+        )
+    try:
+        bounds = _date_bounds(request)
+    except ValueError as err:
+        return json_response({"error": str(err)}, status=400)
+
+    pretty = wants_pretty(request)
+    return cached_response(
+        request,
+        "summary",
+        lambda: _rollup_summary(granularity, bounds["from"], bounds["to"], pretty),
+    )
+
+
+def _rollup_summary(granularity, start, end, pretty=False):
+    periods = []
+    grand_total = Decimal("0")
+    for period_start, totals in rollup_summary(granularity, start, end):
+        categories_dict = {}
+        period_total = Decimal("0")
+        period_count = 0
+        for (category, subcategory), (total, count) in sorted(totals.items()):
+            categories_dict.setdefault(category, {})[subcategory] = total
+            period_total += total
+            period_count += count
+        grand_total += period_total
+        periods.append(
+            {
+                "period": period_start,
+                "categories": categories_dict,
+                "total": period_total,
+                "count": period_count,
+            }
+        )
+
+    data = {
+        "granularity": granularity,
+        "periods": periods,
+        "grand_total": grand_total,
+    }
+    return dumps(data, pretty)
+
+
+ANALYTICS_REPORTS = ("monthly", "subcategories", "moving-average")
+MAX_MOVING_AVERAGE_WINDOW = 366
+
+
+@require_GET
+def analytics_api(request, report):
+    """
+    Spending analytics computed from the in-memory columnar ledger.
+
+    Reports: ``monthly`` (totals per month; ``by=category`` splits them per
+    subcategory), ``subcategories`` (totals per subcategory) and
+    ``moving-average`` (daily totals with the average of the last ``window``
+    days, default 7). All accept ISO dates ``from`` / ``to`` (inclusive) and
+    ``category`` / ``subcategory`` filters.
+    """
+    if report not in ANALYTICS_REPORTS:
+        return json_response(
+            {"error": f"report must be one of {', '.join(ANALYTICS_REPORTS)}"},
+            status=404,
+        )
+    try:
+        bounds = _date_bounds(request)
+    except ValueError as err:
+        return json_response({"error": str(err)}, status=400)
+    try:
+        window = int(request.GET.get("window", 7))
+    except ValueError:
+        return json_response({"error": "window must be an integer"}, status=400)
+    if not 1 <= window <= MAX_MOVING_AVERAGE_WINDOW:
+        return json_response(
+            {"error": f"window must be between 1 and {MAX_MOVING_AVERAGE_WINDOW}"},
+            status=400,
+        )
+
+    index = category_index()
+    category = request.GET.get("category")
+    subcategory = request.GET.get("subcategory")
+    category_ids = None
+    if category or subcategory:
+        category_ids = [
+            pk
+            for (cat, sub), pk in index.ids.items()
+            if (not category or cat == category)
+            and (not subcategory or sub == subcategory)
+        ]
+
+    pretty = wants_pretty(request)
+    return cached_response(
+        request,
+        f"analytics-{report}",
+        lambda: _analytics(
+            report,
+            index,
+            bounds["from"],
+            bounds["to"],
+            category_ids,
+            window,
+            request.GET.get("by") == "category",
+            pretty,
+        ),
+    )
+
+
+def _money(cents):
+    """Whole cents as a two-place Decimal."""
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def _analytics(report, index, start, end, category_ids, window, by_category, pretty):
+    columns = columnar.ledger_columns()
+    names = {pk: key for key, pk in index.ids.items()}
+    data = {"report": report}
+
+    if report == "moving-average":
+        mask = columnar.select(columns, category_ids=category_ids)
+        data["window"] = window
+        data["days"] = [
+            {"day": day, "total": _money(total), "moving_average": _money(round(avg))}
+            for day, total, avg in columnar.daily_moving_average(
+                columns, mask, window, start, end
+            )
+        ]
+        return dumps(data, pretty)
+
+    mask = columnar.select(columns, start, end, category_ids)
+    if report == "monthly":
+        months = []
+        for month, pk, total, count in columnar.monthly_totals(
+            columns, mask, by_category
+        ):
+            row = {"month": month}
+            if pk is not None:
+                row["category"], row["subcategory"] = names.get(pk, (None, None))
+            row.update(total=_money(total), count=count)
+            months.append(row)
+        data["months"] = months
+    else:
+        data["subcategories"] = sorted(
+            (
+                {
+                    "category": names.get(pk, (None, None))[0],
+                    "subcategory": names.get(pk, (None, None))[1],
+                    "total": _money(total),
+                    "count": count,
+                }
+                for pk, total, count in columnar.category_totals(columns, mask)
+            ),
+            key=lambda row: (row["category"] or "", row["subcategory"] or ""),
+        )
+    data["grand_total"] = _money(columns.cents[mask].sum())
+    return dumps(data, pretty)
 
 
 def categories():
-    category_pairs = Category.objects.values_list("category", "subcategory").distinct()
+    # {category: [subcategory, ...]} from the process-local category index
+    return category_index().lists
 
-    # Organize into the required structure
-    categories_dict = {}
 
-    for category, subcategory in category_pairs:
-        if category not in categories_dict:
-            categories_dict[category] = []
-        categories_dict[category].append(subcategory)
-    return categories_dict
+async def get_categories_json(request):
+    # The body is serialised once per category version and reused
+    index = await acategory_index()
+    if etag_matches(request, index.etag):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(index.json, content_type="application/json")
+    response["ETag"] = index.etag
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+@require_GET
+def cache_stats_api(request):
+    # Counters of this worker's response cache
+    return json_response(response_cache.stats(), request=request)
+
+
+@require_GET
+def metrics_view(request):
+    # Prometheus scrape target for this worker; local clients only
+    if request.META.get("REMOTE_ADDR") not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponse(status=403)
+    return HttpResponse(
+        render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def validate_transaction(data, index):
+    """
+    Check one transaction payload against ``index`` (a CategoryIndex).
+
+    Returns ``(category_id, amount)``; raises ValueError with the message to
+    send back to the client.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+
+    # Extract and validate required fields
+    category = data.get("category")
+    subcategory = data.get("subcategory")
+    amount_str = data.get("amount")
+
+    # Check if all required fields are present
+    if not category:
+        raise ValueError("Category is required")
+
+    if not subcategory:
+        raise ValueError("Subcategory is required")
+
+    if not amount_str:
+        raise ValueError("Amount is required")
+
+    # Validate amount is positive
+    field = MoneyField()
+    try:
+        # Convert to Decimal for precise monetary calculation
+        amount = field.to_python(str(amount_str))
+    except ValidationError:
+        raise ValueError("Invalid amount format. Please provide a valid number.")
+
+    # Check if amount is positive
+    if amount <= Decimal("0"):
+        raise ValueError("Amount must be a positive number")
+
+    # Stored amounts are whole cents in a BIGINT: anything finer or larger
+    # would be rounded or overflow on insert, and the category totals and
+    # rollups would no longer add up to the stored rows
+    try:
+        field.run_validators(amount)
+    except ValidationError as err:
+        raise ValueError(" ".join(err.messages))
+
+    # Validate category exists
+    if category not in index.tree:
+        raise ValueError(f'Category "{category}" does not exist')
+
+    # Validate subcategory exists under the specified category
+    if subcategory not in index.tree[category]:
+        raise ValueError(
+            f'Subcategory "{subcategory}" does not exist under category "{category}"'
+        )
+
+    return index.ids[(category, subcategory)], amount
 
 
-def get_categories_json(request):
-    # Query to get all unique category-subcategory pairs
-    # Using values_list to get distinct pairs
-    categories_dict = categories()
-    return JsonResponse(categories_dict)
+def _add_transaction(transaction):
+    # Save the transaction together with its category total
+    with atomic():
+        transaction.save()
+        Category.objects.filter(pk=transaction.category_ref_id).update(
+            total_sum=F("total_sum") + cents(transaction.amount)
+        )
+    return transaction
 
 
 @csrf_exempt
 @require_POST
-def transaction_add(request):
+async def transaction_add(request):
     """
     Handle POST request to add a new transaction.
     Expected JSON data: {
@@ -81,147 +373,298 @@ def transaction_add(request):
         "subcategory": "subcategory_name",
         "amount": 123.45
     }
+
+    With ``WRITE_BUFFER_ENABLED`` the row is committed together with other
+    concurrent requests' rows by the write buffer.
     """
     try:
         # Parse JSON data from request
-        data = json.loads(request.body)
-
-        # Extract and validate required fields
-        category = data.get("category")
-        subcategory = data.get("subcategory")
-        amount_str = data.get("amount")
-
-        # Check if all required fields are present
-        if not category:
-            return JsonResponse({"error": "Category is required"}, status=400)
-
-        if not subcategory:
-            return JsonResponse({"error": "Subcategory is required"}, status=400)
-
-        if not amount_str:
-            return JsonResponse({"error": "Amount is required"}, status=400)
+        data = loads(request.body)
 
-        # Validate amount is positive
+        # Validate category/subcategory against the cached category tree
         try:
-            # Convert to Decimal for precise monetary calculation
-            amount = Decimal(str(amount_str))
-
-            # Check if amount is positive
-            if amount <= Decimal("0"):
-                return JsonResponse(
-                    {"error": "Amount must be a positive number"}, status=400
-                )
-
-        except (InvalidOperation, ValueError, TypeError):
-            return JsonResponse(
-                {"error": "Invalid amount format. Please provide a valid number."},
-                status=400,
-            )
-
-        # Get categories dictionary to validate category/subcategory
-        categories_dict = categories()
+            category_id, amount = validate_transaction(data, await acategory_index())
+        except ValueError as err:
+            return json_response({"error": str(err)}, status=400)
 
-        # Validate category exists
-        if category not in categories_dict:
-            return JsonResponse(
-                {"error": f'Category "{category}" does not exist'}, status=400
-            )
-
-        # Validate subcategory exists under the specified category
-        if subcategory not in categories_dict[category]:
-            return JsonResponse(
-                {
-                    "error": f'Subcategory "{subcategory}" does not exist under category "{category}"'
-                },
-                status=400,
-            )
-
-        # Create and save the transaction
         transaction = Transaction(
-            datetime=datetime.now(),  # Auto-generate current datetime
-            category=category,
-            subcategory=subcategory,
+            datetime=timezone.now(),  # Auto-generate current datetime
+            category_ref_id=category_id,
             amount=amount,
         )
-
-        transaction.save()
-
-        updated_count = Category.objects.filter(
-            category=category,
-            subcategory=subcategory,
-        ).update(total_sum=F("total_sum") + amount)
+        write_buffer = get_write_buffer()
+        if write_buffer is not None:
+            transaction = await asyncio.wrap_future(write_buffer.submit(transaction))
+        else:
+            transaction = await sync_to_async(_add_transaction)(transaction)
 
         # Return success response
-        return JsonResponse(
+        return json_response(
             {
                 "success": True,
                 "message": "Transaction added successfully",
                 "transaction": {
                     "id": transaction.id,
-                    "datetime": transaction.datetime.isoformat(),
-                    "category": transaction.category,
-                    "subcategory": transaction.subcategory,
-                    "amount": str(transaction.amount),
+                    "datetime": transaction.datetime,
+                    "category": data["category"],
+                    "subcategory": data["subcategory"],
+                    # As stored: whole cents, e.g. "12.3" comes back as 12.30
+                    "amount": to_money(transaction.amount),
                 },
             },
             status=201,
         )
 
     except json.JSONDecodeError:
-        return JsonResponse({"error": "Invalid JSON data"}, status=400)
+        return json_response({"error": "Invalid JSON data"}, status=400)
 
     except Exception as e:
         # Log the error for debugging
         # logger.error(f"Error adding transaction: {str(e)}")
 
-        return JsonResponse(
+        return json_response(
             {"error": f"An unexpected error occurred: {str(e)}"}, status=500
         )
 
 
+MAX_BATCH_ROWS = 10_000
+
+
+def _parse_batch(request):
+    """
+    Return the list of row payloads in a batch request body.
+
+    NDJSON bodies (``application/x-ndjson``) yield one item per non-blank
+    line, with unparseable lines kept as ``json.JSONDecodeError`` items so
+    they can be reported per row. Otherwise the body must be a JSON array,
+    or an object with a ``transactions`` array.
+    """
+    if request.content_type in ("application/x-ndjson", "application/jsonl"):
+        rows = []
+        for line in request.body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                rows.append(loads(line))
+            except json.JSONDecodeError as err:
+                rows.append(err)
+        return rows
+
+    data = loads(request.body)
+    if isinstance(data, dict):
+        data = data.get("transactions")
+    if not isinstance(data, list):
+        raise ValueError('Expected a JSON array or {"transactions": [...]}')
+    return data
+
+
+@csrf_exempt
+@require_POST
+def transaction_batch_add(request):
+    """
+    Add many transactions in one request.
+
+    Every row is validated like ``transaction_add`` (plus an optional ISO
+    ``datetime``), the valid ones are inserted with one ``bulk_create`` and
+    each touched Category and rollup bucket gets a single aggregated update,
+    all in one database transaction. Invalid rows are reported and skipped.
+    """
+    try:
+        rows = _parse_batch(request)
+    except (json.JSONDecodeError, ValueError) as err:
+        message = (
+            "Invalid JSON data" if isinstance(err, json.JSONDecodeError) else str(err)
+        )
+        return json_response({"error": message}, status=400)
+
+    if len(rows) > MAX_BATCH_ROWS:
+        return json_response(
+            {"error": f"At most {MAX_BATCH_ROWS} transactions per batch"}, status=400
+        )
+
+    index = category_index()
+    now = timezone.now()
+    results = [None] * len(rows)
+    pending = []
+    for i, data in enumerate(rows):
+        try:
+            if isinstance(data, json.JSONDecodeError):
+                raise ValueError("Invalid JSON data")
+            category_id, amount = validate_transaction(data, index)
+            when = now
+            if data.get("datetime"):
+                when = parse_datetime(str(data["datetime"]))
+                if when is None:
+                    raise ValueError("Invalid datetime format, expected ISO 8601")
+                if timezone.is_naive(when):
+                    when = timezone.make_aware(when, dt_timezone.utc)
+        except ValueError as err:
+            results[i] = {"index": i, "status": "error", "error": str(err)}
+            continue
+        pending.append(
+            (i, Transaction(datetime=when, category_ref_id=category_id, amount=amount))
+        )
+
+    bulk_add_transactions([transaction for _, transaction in pending])
+
+    for i, transaction in pending:
+        results[i] = {
+            "index": i,
+            "status": "created",
+            "id": transaction.id,
+            "datetime": transaction.datetime,
+        }
+
+    created = len(pending)
+    failed = len(rows) - created
+    return json_response(
+        {
+            "success": failed == 0,
+            "created": created,
+            "failed": failed,
+            "results": results,
+        },
+        status=201 if failed == 0 else (200 if created else 400),
+    )
+
+
+TRANSACTION_COUNT_CACHE_KEY = "transaction_api:count"
+TRANSACTION_COUNT_CACHE_SECONDS = 30
+
+
+# Keys of each transaction object, and the values_list lookups behind them
+TRANSACTION_FIELDS = ("id", "datetime", "category", "subcategory", "amount")
+TRANSACTION_LOOKUPS = (
+    "id",
+    "datetime",
+    "category_ref__category",
+    "category_ref__subcategory",
+    "amount",
+)
+
+
+def encode_cursor(pk, dt, direction):
+    """Opaque cursor pointing just past the row ``(pk, dt)`` in ``direction``."""
+    payload = json.dumps(
+        [direction, dt.isoformat(), pk],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return ``(direction, datetime, id)``, or raise ValueError."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        direction, dt, pk = json.loads(base64.urlsafe_b64decode(padded))
+        dt = datetime.fromisoformat(dt)
+        pk = int(pk)
+    except (TypeError, ValueError, binascii.Error):
+        raise ValueError("Invalid cursor")
+    if direction not in ("next", "prev"):
+        raise ValueError("Invalid cursor")
+    return direction, dt, pk
+
+
+async def transaction_keyset_page(request):
+    """
+    Cursor mode of ``transaction_api``.
+
+    Pages are addressed by the ``(datetime, id)`` of the row on their edge
+    rather than by an OFFSET, so every page costs one index range scan. The
+    total count is only computed when ``count=1`` is passed, and is cached
+    for ``TRANSACTION_COUNT_CACHE_SECONDS``.
+    """
+    try:
+        per_page = max(1, int(request.GET.get("per_page", 5)))
+    except ValueError:
+        return json_response({"error": "per_page must be an integer"}, status=400)
+
+    transactions = Transaction.objects.values_list(*TRANSACTION_LOOKUPS)
+    direction = "next"
+    cursor = request.GET.get("cursor")
+    if cursor:
+        try:
+            direction, dt, pk = decode_cursor(cursor)
+        except ValueError as err:
+            return json_response({"error": str(err)}, status=400)
+        if direction == "next":
+            transactions = transactions.filter(
+                Q(datetime__lt=dt) | Q(datetime=dt, id__lt=pk)
+            )
+        else:
+            # Walk backwards in ascending order, then flip the page
+            transactions = transactions.filter(
+                Q(datetime__gt=dt) | Q(datetime=dt, id__gt=pk)
+            ).order_by("datetime", "id")
+
+    rows = [row async for row in transactions[: per_page + 1]]
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == "prev":
+        rows.reverse()
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, bool(cursor)
+
+    data = {
+        "has_next": has_next,
+        "has_previous": has_previous,
+        "next": encode_cursor(*rows[-1][:2], "next") if rows and has_next else None,
+        "prev": encode_cursor(*rows[0][:2], "prev") if rows and has_previous else None,
+        "transactions": records(TRANSACTION_FIELDS, rows),
+    }
+    if request.GET.get("count") in ("1", "true"):
+        count = await cache.aget(TRANSACTION_COUNT_CACHE_KEY)
+        if count is None:
+            count = await Transaction.objects.acount()
+            await cache.aset(
+                TRANSACTION_COUNT_CACHE_KEY, count, TRANSACTION_COUNT_CACHE_SECONDS
+            )
+        data["count"] = count
+
+    return json_response(data, request=request)
+
+
 # API view for JSON data
 @require_GET
-def transaction_api(request):
+async def transaction_api(request):
+    # ?cursor= (empty for the first page) switches to keyset pagination
+    if "cursor" in request.GET:
+        return await transaction_keyset_page(request)
+
     # Get query parameters
     page = request.GET.get("page", 1)
-    per_page = request.GET.get("per_page", 5)
+    per_page = max(1, int(request.GET.get("per_page", 5)))
 
     # Get all transactions ordered by date (recent first)
-    transactions = Transaction.objects.all().order_by("-datetime")
+    transactions = Transaction.objects.order_by("-datetime", "-id")
 
-    # Pagination
-    paginator = Paginator(transactions, per_page)
+    # Pagination, as Paginator does it but on the async ORM
+    count = await transactions.acount()
+    num_pages = max(1, -(-count // per_page))
 
     try:
         page_number = int(page)
         if page_number < 1:
             page_number = 1
-        elif page_number > paginator.num_pages:
-            page_number = paginator.num_pages
+        elif page_number > num_pages:
+            page_number = num_pages
     except ValueError:
         page_number = 1
 
-    page_obj = paginator.get_page(page_number)
+    offset = (page_number - 1) * per_page
+    rows = transactions.values_list(*TRANSACTION_LOOKUPS)[offset : offset + per_page]
+    object_list = [row async for row in rows]
 
     # Prepare data for JSON response
     data = {
-        "count": paginator.count,
-        "num_pages": paginator.num_pages,
-        "current_page": page_obj.number,
-        "has_next": page_obj.has_next(),
-        "has_previous": page_obj.has_previous(),
-        "transactions": [],
+        "count": count,
+        "num_pages": num_pages,
+        "current_page": page_number,
+        "has_next": page_number < num_pages,
+        "has_previous": page_number > 1,
+        "transactions": records(TRANSACTION_FIELDS, object_list),
     }
 
-    for transaction in page_obj.object_list:
-        data["transactions"].append(
-            {
-                "id": transaction.id,
-                "datetime": transaction.datetime.isoformat(),
-                "category": transaction.category,
-                "subcategory": transaction.subcategory,
-                "amount": str(transaction.amount),  # Convert Decimal to string
-            }
-        )
-
-    return JsonResponse(data, safe=False, json_dumps_params={"indent": 2})
+    return json_response(data, request=request)
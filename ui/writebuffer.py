@@ -0,0 +1,137 @@
+"""
+Group commit for concurrent ``transaction_add`` writes.
+
+SQLite allows one writer at a time, so each request committing its own
+INSERT and Category UPDATE serialises on the database lock, and under load
+some of them time out with "database is locked". With
+``WRITE_BUFFER_ENABLED`` the view hands its row to a WriteBuffer instead:
+a single flusher thread collects the rows arriving within
+``WRITE_BUFFER_MAX_LATENCY_MS`` of the first (at most
+``WRITE_BUFFER_MAX_BATCH``), commits them with ``bulk_add_transactions`` in
+one transaction, and resolves each caller's future with its saved row.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.db.transaction import atomic
+
+from .caching import LEDGER, bump_version
+from .fields import cents
+from .models import Category, Transaction
+from .rollups import apply_rollup_deltas
+
+
+def bulk_add_transactions(transactions):
+    """
+    Insert unsaved Transactions with one ``bulk_create``, and apply them to
+    the category totals and rollups with one update per category and
+    bucket, all in one database transaction.
+    """
+    totals = {}
+    for transaction in transactions:
+        totals[transaction.category_ref_id] = (
+            totals.get(transaction.category_ref_id, Decimal("0")) + transaction.amount
+        )
+
+    with atomic():
+        Transaction.objects.bulk_create(transactions)
+        for category_id, total in totals.items():
+            Category.objects.filter(pk=category_id).update(
+                total_sum=F("total_sum") + cents(total)
+            )
+        apply_rollup_deltas(
+            (t.datetime, t.category_ref_id, t.amount, 1) for t in transactions
+        )
+        if transactions:
+            bump_version(LEDGER)
+    return transactions
+
+
+class WriteBuffer:
+    """Coalesces Transaction inserts from many threads into shared commits."""
+
+    def __init__(self, max_latency=0.002, max_batch=500):
+        self.max_latency = max_latency
+        self.max_batch = max_batch
+        self.batches = 0
+        self.rows = 0
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, transaction):
+        """Queue an unsaved Transaction; the Future resolves to it once saved."""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="write-buffer", daemon=True
+                    )
+                    self._thread.start()
+        future = Future()
+        self._queue.put((transaction, future))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_latency
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                if timeout > 0:
+                    batch.append(self._queue.get(timeout=timeout))
+                else:
+                    # Window closed: still take whatever is already waiting
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            self.batches += 1
+            self.rows += len(batch)
+            close_old_connections()
+            try:
+                bulk_add_transactions([transaction for transaction, _ in batch])
+            except Exception:
+                # Commit rows one by one so a bad row only fails its own request
+                for transaction, future in batch:
+                    transaction.pk = None
+                    try:
+                        bulk_add_transactions([transaction])
+                    except Exception as err:
+                        future.set_exception(err)
+                    else:
+                        future.set_result(transaction)
+            else:
+                for transaction, future in batch:
+                    future.set_result(transaction)
+
+
+_write_buffer = None
+_write_buffer_lock = threading.Lock()
+
+
+def get_write_buffer():
+    """The process-wide WriteBuffer, or None if group commit is disabled."""
+    global _write_buffer
+    if not getattr(settings, "WRITE_BUFFER_ENABLED", False):
+        return None
+    if _write_buffer is None:
+        with _write_buffer_lock:
+            if _write_buffer is None:
+                _write_buffer = WriteBuffer(
+                    max_latency=getattr(settings, "WRITE_BUFFER_MAX_LATENCY_MS", 2)
+                    / 1000,
+                    max_batch=getattr(settings, "WRITE_BUFFER_MAX_BATCH", 500),
+                )
+    return _write_buffer